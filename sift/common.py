@@ -18,7 +18,7 @@ numba
 :copyright: 2015 by University of Wisconsin Regents, see AUTHORS for more details
 :license: GPLv3, see LICENSE for more details
 """
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from typing import MutableSequence, Tuple, Optional, Iterable, Any
 
 import numpy as np
@@ -126,17 +126,78 @@ class flags(set):
 
 WORLD_EXTENT_BOX = box(b=-MAX_EXCURSION_Y, l=-MAX_EXCURSION_X, t=MAX_EXCURSION_Y, r=MAX_EXCURSION_X)
 
-# presentation information for a layer; z_order comes from the layerset
-prez = namedtuple('prez', [
-    'uuid',      # UUID: dataset in the document/workspace
-    'kind',      # what kind of layer it is
-    'visible',   # bool: whether it's visible or not
-    'a_order',   # int: None for non-animating, 0..n-1 what order to draw in during animation
-    'colormap',  # name or uuid: color map to use; name for default, uuid for user-specified
-    'climits',   # tuple: valid min and valid max used for color mapping normalization
-    'gamma',     # float: valid (0 to 5) for gamma correction (default should be 1.0)
-    'mixing'     # mixing mode constant
-])
+class prez(object):
+    """presentation information for a layer; z_order comes from the layerset
+    Behaves like the namedtuple it replaced (fields, _replace, iteration, equality, pickling),
+    but the layer set owning it may update visible and a_order in place instead of allocating a new one.
+    A prez therefore belongs to exactly one layer set; signals and other layer sets are handed a _replace() copy.
+    """
+    __slots__ = (
+        'uuid',      # UUID: dataset in the document/workspace
+        'kind',      # what kind of layer it is
+        'visible',   # bool: whether it's visible or not
+        'a_order',   # int: None for non-animating, 0..n-1 what order to draw in during animation
+        'colormap',  # name or uuid: color map to use; name for default, uuid for user-specified
+        'climits',   # tuple: valid min and valid max used for color mapping normalization
+        'gamma',     # float: valid (0 to 5) for gamma correction (default should be 1.0)
+        'mixing',    # mixing mode constant
+    )
+    _fields = __slots__
+    _field_set = frozenset(__slots__)
+    __hash__ = None  # mutable
+
+    def __init__(self, uuid, kind, visible, a_order, colormap, climits, gamma, mixing):
+        self.uuid = uuid
+        self.kind = kind
+        self.visible = visible
+        self.a_order = a_order
+        self.colormap = colormap
+        self.climits = climits
+        self.gamma = gamma
+        self.mixing = mixing
+
+    @classmethod
+    def _make(cls, iterable):
+        return cls(*iterable)
+
+    def _replace(self, **kwargs):
+        if not self._field_set.issuperset(kwargs):
+            raise ValueError('got unexpected field names: %r' % [k for k in kwargs if k not in self._field_set])
+        p = prez.__new__(self.__class__)
+        for field in self._fields:
+            setattr(p, field, getattr(self, field))
+        for field, value in kwargs.items():
+            setattr(p, field, value)
+        return p
+
+    def _asdict(self):
+        return OrderedDict((field, getattr(self, field)) for field in self._fields)
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            return getattr(self, self._fields[index])
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (prez, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __reduce__(self):
+        return self.__class__, tuple(self)
+
+    def __repr__(self):
+        return 'prez(%s)' % ', '.join('%s=%r' % (field, getattr(self, field)) for field in self._fields)
 
 
 class STATE(Enum):
@@ -918,6 +979,73 @@ class ZList(MutableSequence):
             return zult
 
 
+# ============================
+# support and testing routines
+
+class tests(unittest.TestCase):
+    def setUp(self):
+        from uuid import uuid1
+        self.p = prez(uuid=uuid1(), kind=KIND.IMAGE, visible=True, a_order=None,
+                      colormap='grays', climits=(0., 1.), gamma=1., mixing=None)
+
+    def test_prez_fields_and_iteration(self):
+        p = self.p
+        self.assertEqual(prez._fields, ('uuid', 'kind', 'visible', 'a_order', 'colormap', 'climits', 'gamma', 'mixing'))
+        self.assertEqual(len(p), 8)
+        self.assertEqual(tuple(p), tuple(getattr(p, f) for f in prez._fields))
+        self.assertEqual(prez._make(tuple(p)), p)
+        self.assertEqual(list(p._asdict().keys()), list(prez._fields))
+
+    def test_prez_equality(self):
+        p = self.p
+        self.assertEqual(p, prez(*tuple(p)))
+        self.assertEqual(p, tuple(p))
+        self.assertFalse(p != tuple(p))
+        self.assertNotEqual(p, p._replace(visible=False))
+        self.assertNotEqual(p, tuple(p)[:-1])
+        self.assertFalse(p == list(p))
+
+    def test_prez_indexing(self):
+        p = self.p._replace(colormap='rainbow', gamma=2.)
+        self.assertIs(p[0], p.uuid)
+        self.assertEqual(p[4], 'rainbow')
+        self.assertEqual(p[-2], 2.)
+        self.assertEqual(p[1:3], (p.kind, p.visible))
+        with self.assertRaises(IndexError):
+            p[8]
+
+    def test_prez_replace(self):
+        p = self.p
+        q = p._replace(colormap='rainbow', a_order=3)
+        self.assertEqual((q.colormap, q.a_order), ('rainbow', 3))
+        self.assertEqual((p.colormap, p.a_order), ('grays', None))
+        self.assertEqual(tuple(q)[:3], tuple(p)[:3])
+        with self.assertRaises(ValueError):
+            p._replace(not_a_field=1)
+
+    def test_prez_copy_is_independent(self):
+        copy = self.p._replace()
+        self.assertIsNot(copy, self.p)
+        self.assertEqual(copy, self.p)
+        copy.visible = False
+        copy.a_order = 0
+        self.assertTrue(self.p.visible)
+        self.assertIsNone(self.p.a_order)
+
+    def test_prez_pickle(self):
+        import pickle
+        p = self.p._replace(a_order=2, climits=(-5., 5.))
+        q = pickle.loads(pickle.dumps(p))
+        self.assertIsInstance(q, prez)
+        self.assertEqual(q, p)
+
+    def test_prez_slots(self):
+        with self.assertRaises(TypeError):
+            hash(self.p)
+        with self.assertRaises(AttributeError):
+            self.p.not_a_field = 1
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="PURPOSE",
@@ -64,8 +64,8 @@ import sys
 import logging
 import unittest
 import argparse
-from collections import MutableSequence, OrderedDict, defaultdict
-from itertools import groupby, chain
+from collections import OrderedDict, defaultdict
+from itertools import chain
 from uuid import UUID, uuid1 as uuidgen
 from datetime import datetime, timedelta
 import typing as T
@@ -75,6 +75,7 @@ from weakref import ref
 import os
 import json
 import warnings
+from contextlib import contextmanager
 from sqlalchemy.orm import Session
 
 from sift.workspace.metadatabase import Product
@@ -89,10 +90,16 @@ from PyQt4.QtCore import QObject, pyqtSignal
 
 from vispy.color.colormap import Colormap
 
+from numba import jit
+
 
 LOG = logging.getLogger(__name__)
 
 DEFAULT_LAYER_SET_COUNT = 1  # this should match the ui configuration!
+_EQUALIZER_IMAGE_KINDS = frozenset((KIND.IMAGE, KIND.COMPOSITE, KIND.CONTOUR))
+
+# RGB component letter to its position in per-component tuples such as color limits
+_RGBA_INDEX = {'r': 0, 'g': 1, 'b': 2, 'a': 3}
 
 
 def unit_symbol(unit):
@@ -143,6 +150,32 @@ def _unit_format_func(layer, units):
     return _format_unit
 
 
+@jit(nopython=True, cache=True)
+def _sci_to_rgb(v, cmin, cmax):
+    """Scale v within the (possibly reversed) limits cmin..cmax to 0..255, or -1 if v is NaN
+    """
+    if np.isnan(v):
+        return -1
+    if cmin == cmax:
+        return 0
+    lo, hi = (cmax, cmin) if cmin > cmax else (cmin, cmax)
+    v = min(max(v, lo), hi)
+    return int(round(abs(v - cmin) / abs(cmax - cmin) * 255.))
+
+
+@jit(nopython=True, cache=True)
+def _scan_active(visible, a_order, valid):
+    """Return the rows, top to bottom, which are valid and either visible or in the animation order
+    """
+    rows = np.empty(visible.shape[0], dtype=np.int32)
+    n = 0
+    for i in range(visible.shape[0]):
+        if valid[i] and (visible[i] or a_order[i] >= 0):
+            rows[n] = i
+            n += 1
+    return rows[:n]
+
+
 def preferred_units(dsi):
     # FUTURE: Use cfunits or cf_units package
     if dsi[INFO.STANDARD_NAME] == 'toa_bidirectional_reflectance':
@@ -153,61 +186,155 @@ def preferred_units(dsi):
         return dsi.get(INFO.UNITS, None)
 
 
+def _kelvin_to_celsius(x, inverse=False):
+    return x - 273.15 if not inverse else x + 273.15
+
+
+def _percent_to_fraction(x, inverse=False):
+    return x / 100. if not inverse else x * 100.
+
+
+def _no_conversion(x, inverse=False):
+    return x
+
+
 def units_conversion(dsi):
     "return UTF8 unit string, lambda v,inverse=False: convert-raw-data-to-unis"
     # the dataset might be in one unit, but the user may want something else
     # FUTURE: Use cfunits or cf_units package
     punits = preferred_units(dsi)
 
-    # Conversion functions
+    # Conversion functions, shared module functions so layers with the same conversion can be batched together
     # FUTURE: Use cfunits or cf_units package
     if dsi.get(INFO.UNITS) in ('kelvin', 'K') and punits in ('degrees_Celsius', 'C'):
-        conv_func = lambda x, inverse=False: x - 273.15 if not inverse else x + 273.15
+        conv_func = _kelvin_to_celsius
     elif dsi.get(INFO.UNITS) == '%' and punits == '1':
-        conv_func = lambda x, inverse=False: x / 100. if not inverse else x * 100.
+        conv_func = _percent_to_fraction
     else:
-        conv_func = lambda x, inverse=False: x
+        conv_func = _no_conversion
 
     # Format strings
     format_func = _unit_format_func(dsi, punits)
     return punits, conv_func, format_func
 
 
-class DocLayerStack(MutableSequence):
+class DocLayerStack(object):
     """
     list-like layer set which will slowly eat functionality from Document as warranted, and provide cleaner interfacing to GUI elements
+    only the list operations callers use are provided, each directly on the underlying list and uuid-to-row map
+    visibility and animation order are also kept as array columns parallel to the rows, so scans for active layers are array operations
     """
     _doc = None  # weakref to document we belong to
     _store = None
-    _u2r = None  # uuid-to-row correspondence cache
+    _u2r = None  # uuid-to-row correspondence, kept up to date as the stack changes
+    _ao = None  # cached animation_order tuple, None when it needs recalculating
+    _uuids = None  # cached uuids_snapshot tuple, None when rows have moved or changed uuid
+    _visible = None  # uint8 column of prez.visible by row, capacity may exceed len(_store)
+    _a_order = None  # int16 column of prez.a_order by row, -1 for None
 
     def __init__(self, doc, *args, **kwargs):
         if isinstance(doc, DocLayerStack):
             self._doc = ref(doc._doc())
-            self._store = list(doc._store)
+            # prez are updated in place, so a cloned set needs its own
+            self._store = [p._replace() for p in doc._store]
         elif isinstance(doc, Document):
             self._doc = ref(doc)
             self._store = list(*args)
         else:
             raise ValueError('cannot initialize DocLayerStack using %s' % type(doc))
+        self._u2r = dict((p.uuid,i) for (i,p) in enumerate(self._store))
+        self._rebuild_columns()
+
+    def _rebuild_columns(self):
+        cap = max(16, len(self._store))
+        # one byte and two bytes per row keep the per-frame scans small
+        self._visible = np.zeros(cap, dtype=np.uint8)
+        self._a_order = np.full(cap, -1, dtype=np.int16)
+        for row, p in enumerate(self._store):
+            self._set_columns(row, p)
+
+    def _set_columns(self, row:int, p: prez):
+        self._visible[row] = bool(p.visible)
+        self._a_order[row] = -1 if p.a_order is None else p.a_order
+
+    def _reserve(self, n:int):
+        """grow the columns, amortized like a list, so they can hold n rows"""
+        cap = len(self._visible)
+        if n <= cap:
+            return
+        cap = max(n, 2 * cap)
+        visible = np.zeros(cap, dtype=self._visible.dtype)
+        visible[:len(self._visible)] = self._visible
+        a_order = np.full(cap, -1, dtype=self._a_order.dtype)
+        a_order[:len(self._a_order)] = self._a_order
+        self._visible, self._a_order = visible, a_order
+
+    def _reindex_from(self, row:int):
+        """update uuid-to-row for rows at or after `row`, after an insert or delete shifted them"""
+        self._uuids = None
+        u2r = self._u2r
+        for i in range(row, len(self._store)):
+            u2r[self._store[i].uuid] = i
 
     def __setitem__(self, index:int, value: prez):
         if index>=0 and index<len(self._store):
+            old = self._store[index]
             self._store[index] = value
+            self._set_columns(index, value)
+            if old.a_order != value.a_order or (old.a_order is not None and old.uuid != value.uuid):
+                self._ao = None
+            if old.uuid != value.uuid:
+                # most assignments are _replace of a field, which keep the same uuid and row
+                if self._u2r.get(old.uuid) == index:
+                    del self._u2r[old.uuid]
+                self._u2r[value.uuid] = index
+                self._uuids = None
         elif index == len(self._store):
-            self._store.append(value)
+            self.insert(index, value)
         else:
             raise IndexError('%d not a valid index' % index)
-        self._u2r = None
+
+    def set_visible(self, row:int, visible:bool):
+        """update the visibility of the prez at row in place"""
+        self._store[row].visible = visible
+        self._visible[row] = bool(visible)
+
+    def set_a_order(self, row:int, a_order):
+        """update the animation order of the prez at row in place"""
+        p = self._store[row]
+        if p.a_order != a_order:
+            p.a_order = a_order
+            self._a_order[row] = -1 if a_order is None else a_order
+            self._ao = None
 
     @property
     def uuid2row(self):
-        if self._u2r is None:
-            self._u2r = dict((p.uuid,i) for (i,p) in enumerate(self._store))
         return self._u2r
 
+    @property
+    def uuids_snapshot(self):
+        """tuple of layer uuids top to bottom, reused until rows are inserted, removed, reordered or replaced"""
+        uuids = self._uuids
+        if uuids is None:
+            self._uuids = uuids = tuple(p.uuid for p in self._store)
+        return uuids
+
+    def active_rows(self):
+        """rows which are visible or in the animation order, top to bottom"""
+        n = len(self._store)
+        return np.flatnonzero(self._visible[:n] | (self._a_order[:n] >= 0)).tolist()
+
+    def columns(self):
+        """(visible, a_order) arrays by row, a_order is -1 for layers not in the animation order; do not modify"""
+        n = len(self._store)
+        return self._visible[:n], self._a_order[:n]
+
+    def visible_rows(self):
+        """rows which are visible, top to bottom"""
+        return np.flatnonzero(self._visible[:len(self._store)]).tolist()
+
     def __getitem__(self, index:int):  # then return layer object
-        if isinstance(index, int):
+        if isinstance(index, (int, slice)):
             return self._store[index]
         elif isinstance(index, UUID):  # then return 0..n-1 index in stack
             return self.uuid2row.get(index, None)
@@ -219,23 +346,104 @@ class DocLayerStack(MutableSequence):
             raise ValueError('unable to index LayerStack using %s' % repr(index))
 
     def __iter__(self):
-        for each in self._store:
-            yield each
+        return iter(self._store)
+
+    def __reversed__(self):
+        return reversed(self._store)
 
     def __len__(self):
         return len(self._store)
 
+    def __contains__(self, item):
+        if isinstance(item, UUID):
+            return item in self._u2r
+        elif isinstance(item, DocLayer):
+            return item.uuid in self._u2r
+        return item in self._store
+
     def __delitem__(self, index:int):
+        n = len(self._store)
+        if isinstance(index, slice):
+            rows = range(*index.indices(n))
+            if not rows:
+                return
+            first = min(rows[0], rows[-1])
+        else:
+            if index < 0:
+                index += n
+            rows = (index,)
+            first = index
+        for row in rows:
+            p = self._store[row]
+            self._u2r.pop(p.uuid, None)
+            if p.a_order is not None:
+                self._ao = None
         del self._store[index]
-        self._u2r = None
+        m = len(self._store)
+        for col, blank in ((self._visible, 0), (self._a_order, -1)):
+            col[:m] = np.delete(col[:n], list(rows))
+            col[m:n] = blank
+        self._reindex_from(first)
+
+    def remove_uuids(self, uuids):
+        """delete the rows holding any of `uuids` in one pass, shifting the remaining rows up once; return the count removed"""
+        u2r = self._u2r
+        rows = sorted(u2r[u] for u in set(uuids) if u in u2r)
+        if not rows:
+            return 0
+        n = len(self._store)
+        keep = np.ones(n, dtype=bool)
+        keep[rows] = False
+        for row in rows:
+            p = self._store[row]
+            del u2r[p.uuid]
+            if p.a_order is not None:
+                self._ao = None
+        self._store = [p for p, kept in zip(self._store, keep) if kept]
+        m = len(self._store)
+        for col, blank in ((self._visible, 0), (self._a_order, -1)):
+            col[:m] = col[:n][keep]
+            col[m:n] = blank
+        self._reindex_from(rows[0])
+        return len(rows)
 
     def insert(self, index:int, value: prez):
-        self._store.insert(index, value)
-        self._u2r = None
+        self.bulk_insert(index, (value,))
+
+    def bulk_insert(self, index:int, values):
+        """insert a sequence of prez at index in one splice, shifting the rows below once"""
+        values = list(values)
+        k = len(values)
+        if not k:
+            return
+        n = len(self._store)
+        # same clamping as list.insert
+        if index < 0:
+            index = max(0, n + index)
+        index = min(index, n)
+        self._store[index:index] = values
+        self._reserve(n + k)
+        for col in (self._visible, self._a_order):
+            col[index + k:n + k] = col[index:n].copy()
+        for row, value in enumerate(values, index):
+            self._set_columns(row, value)
+            if value.a_order is not None:
+                self._ao = None
+        self._reindex_from(index)
+
+    def append(self, value: prez):
+        self.insert(len(self._store), value)
+
+    def pop(self, index:int=-1):
+        value = self._store[index]
+        del self[index]
+        return value
 
     def clear_animation_order(self):
-        for i,q in enumerate(self._store):
-            self._store[i] = q._replace(a_order=None)
+        for q in self._store:
+            q.a_order = None
+        self._a_order[:] = -1
+        self._ao = ()
 
     def index(self, uuid):
         assert(isinstance(uuid, UUID))
@@ -243,28 +451,48 @@ class DocLayerStack(MutableSequence):
         return u2r.get(uuid, None)
 
     def change_order_by_indices(self, new_order):
-        self._u2r = None
         revised = [self._store[n] for n in new_order]
+        n, m = len(self._store), len(revised)
+        new_order = list(new_order)
+        for col, blank in ((self._visible, 0), (self._a_order, -1)):
+            col[:m] = col[new_order]
+            col[m:n] = blank
         self._store = revised
+        self._reindex_from(0)
 
     @property
     def animation_order(self):
-        aouu = [(x.a_order, x.uuid) for x in self._store if (x.a_order is not None)]
-        aouu.sort()
-        ao = tuple(u for a,u in aouu)
-        LOG.debug('animation order is {0!r:s}'.format(ao))
+        ao = self._ao
+        if ao is None:
+            self._ao = ao = self._calc_animation_order()
+            LOG.debug('animation order is {0!r:s}'.format(ao))
         return ao
 
+    def _calc_animation_order(self):
+        a_order = self._a_order[:len(self._store)]
+        rows = np.flatnonzero(a_order >= 0)
+        rows = rows[np.argsort(a_order[rows], kind='stable')]
+        store = self._store
+        return tuple(store[row].uuid for row in rows)
+
     @animation_order.setter
     def animation_order(self, layer_or_uuid_seq):
-        self.clear_animation_order()
-        for nth,lu in enumerate(layer_or_uuid_seq):
+        new_rows = []
+        for lu in layer_or_uuid_seq:
             try:
-                idx = self[lu]
+                new_rows.append(self[lu])
             except ValueError:
                 LOG.warning('unable to find layer in LayerStack')
                 raise
-            self._store[idx] = self._store[idx]._replace(a_order=nth)
+        old_order = self.animation_order
+        if tuple(self._store[idx].uuid for idx in new_rows) == old_order:
+            return
+        # only rows which were or will be animating can change
+        new_a_order = dict((idx, nth) for nth, idx in enumerate(new_rows))
+        u2r = self._u2r
+        for idx in set(u2r[u] for u in old_order) | set(new_rows):
+            self.set_a_order(idx, new_a_order.get(idx))
+        self._ao = None
 
 
 # FUTURE: move these into separate modules
@@ -350,6 +578,7 @@ class DocumentAsLayerStack(DocumentAsContextBase):
     As we transition to timeline model, this stops representing products and starts being a track stack
     """
     _all_active: bool = False  # whether to represent all active products in document timespan, or just the ones under the playhead
+    _units: dict = None  # {uuid: (f_convert, f_format)}, fixed once a product is imported
 
     def __enter__(self):
         raise NotImplementedError()
@@ -378,11 +607,32 @@ class DocumentAsLayerStack(DocumentAsContextBase):
         with self.mdb as s:
             prod = s.query(Product).filter_by(uuid_str=str(uuid)).first()
             nfo = prod.info
+            f_convert, f_format = self._units_for_uuid(uuid, nfo)
             return LayerInfo(uuid=uuid,
                              time_label=nfo.get(INFO.DISPLAY_TIME, '--:--'),
                              presentation=self.doc.family_presentation[prod.family],
-                             f_convert=nfo.get(INFO.UNIT_CONVERSION)[1],
-                             f_format=nfo.get(INFO.UNIT_CONVERSION)[2])
+                             f_convert=f_convert,
+                             f_format=f_format)
+
+    def _units_for_uuid(self, uuid, nfo=None):
+        """unit conversion and formatting functions for a product, looked up in the metadatabase only once
+        """
+        if self._units is None:
+            self._units = {}
+        units = self._units.get(uuid)
+        if units is None:
+            if nfo is None:
+                with self.mdb as s:
+                    nfo = s.query(Product).filter_by(uuid_str=str(uuid)).first().info
+            unit_conv = nfo.get(INFO.UNIT_CONVERSION)
+            self._units[uuid] = units = (unit_conv[1], unit_conv[2])
+        return units
+
+    def forget_units_for_uuid(self, uuid):
+        """drop cached unit conversion for a product which is being purged or whose metadata changed
+        """
+        if self._units is not None:
+            self._units.pop(uuid, None)
 
     @property
     def current_layer_uuid_order(self):
@@ -431,11 +681,11 @@ class DocumentAsLayerStack(DocumentAsContextBase):
         # return self[uuid][INFO.CLIM]
 
     def convert_value(self, uuid, x, inverse=False):
-        return self._layer_info_for_uuid(uuid).f_convert(x, inverse=inverse)
+        return self._units_for_uuid(uuid)[0](x, inverse=inverse)
         # return self[uuid][INFO.UNIT_CONVERSION][1](x, inverse=inverse)
 
     def format_value(self, uuid, x, numeric=True, units=True):
-        return self._layer_info_for_uuid(uuid).f_format(x, numeric=numeric, units=units)
+        return self._units_for_uuid(uuid)[1](x, numeric=numeric, units=units)
         # return self[uuid][INFO.UNIT_CONVERSION][2](x, numeric=numeric, units=units)
 
     def flipped_for_uuids(self, uuids, lset=None):
@@ -1110,6 +1360,21 @@ class DocumentAsProductArrayCollection(DocumentAsContextBase):
 ###################################################################################################################
 
 
+class LayerSlot(object):
+    """Fields of a document layer read on every probe event, resolved once instead of per-access dict lookups.
+    Only basic layers are cached this way; composite layers derive CLIM and units from their components.
+    """
+    __slots__ = ('uuid', 'kind', 'clim', 'clim_rising', 'unit_conv')
+
+    def __init__(self, layer):
+        self.uuid = layer[INFO.UUID]
+        self.kind = layer[INFO.KIND]
+        self.clim = clim = layer.get(INFO.CLIM)
+        # direction of the default color limits, compared against presentation climits to detect flipped color scales
+        self.clim_rising = (clim[1] > clim[0]) if (clim is not None and self.kind != KIND.RGB) else None
+        self.unit_conv = layer.get(INFO.UNIT_CONVERSION)
+
+
 class Document(QObject):  # base class is rightmost, mixins left of that
     """Document stores user intent
     Document is a set of tracks in a Z order, with Z>=0 for "active" tracks the user is working with
@@ -1164,6 +1429,12 @@ class Document(QObject):  # base class is rightmost, mixins left of that
     current_set_index = 0
     _layer_sets = None  # list(DocLayerSet(prez, ...) or None)
     _layer_with_uuid = None  # dict(uuid:Doc____Layer)
+    _layer_slots = None  # dict(uuid:LayerSlot) for basic layers
+    _uuids_by_type = None  # dict(layer class: set(uuid))
+    _uuids_by_kind = None  # dict(KIND: set(uuid))
+    _sibling_index = None  # dict((bandwise, uuid): (sibling uuid tuple, index of uuid)), see _siblings_for_step
+    _pending_clims = None  # dict(uuid: clims) collected while inside _batch_color_limits, else None
+    _time_order = None  # list(uuid) of all layers sorted by sched_time, None until rebuilt by _uuids_in_time_order
 
     # signals
     # Clarification: Layer interfaces migrate to layer meaning "current active products under the playhead"
@@ -1225,6 +1496,10 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         self._workspace = workspace
         self._layer_sets = [DocLayerStack(self)] + [None] * (layer_set_count - 1)
         self._layer_with_uuid = {}
+        self._layer_slots = {}
+        self._uuids_by_type = defaultdict(set)
+        self._uuids_by_kind = defaultdict(set)
+        self._sibling_index = {}
         self.colormaps = COLORMAP_MANAGER
         self.available_projections = OrderedDict((
             ('Mercator', {
@@ -1441,11 +1716,11 @@ class Document(QObject):  # base class is rightmost, mixins left of that
                  gamma=gamma,
                  mixing=Mixing.NORMAL)
 
-        q = p._replace(visible=False)  # make it available but not visible in other layer sets
         old_layer_count = len(self._layer_sets[self.current_set_index])
         for dex, lset in enumerate(self._layer_sets):
             if lset is not None:  # uninitialized layer sets will be None
-                lset.insert(insert_before, p if dex == self.current_set_index else q)
+                # prez are updated in place by their layer set, so each other set gets its own, available but not visible
+                lset.insert(insert_before, p if dex == self.current_set_index else p._replace(visible=False))
 
         reordered_indices = tuple([None] + list(range(old_layer_count)))  # FIXME: this should obey insert_before, currently assumes always insert at top
         return p, reordered_indices
@@ -1462,7 +1737,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
                       DeprecationWarning)
         return list(self.import_files([path], insert_before=insert_before))
 
-    def activate_product_uuid_as_new_layer(self, uuid: UUID, insert_before=0, **importer_kwargs):
+    def activate_product_uuid_as_new_layer(self, uuid: UUID, insert_before=0, sync_composites=True, **importer_kwargs):
         if uuid in self._layer_with_uuid:
             LOG.debug("Layer already loaded: {}".format(uuid))
             active_content_data = self._workspace.import_product_content(uuid, **importer_kwargs)
@@ -1476,18 +1751,22 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         LOG.info('cell_width: {}'.format(repr(info[INFO.CELL_WIDTH])))
 
         LOG.info('new layer info: {}'.format(repr(info)))
-        self._layer_with_uuid[uuid] = dataset = DocBasicLayer(self, info)
+        dataset = self._add_layer(uuid, DocBasicLayer(self, info))
         if INFO.UNIT_CONVERSION not in dataset:
             dataset[INFO.UNIT_CONVERSION] = units_conversion(dataset)
         if INFO.FAMILY not in dataset:
             dataset[INFO.FAMILY] = self.family_for_product_or_layer(dataset)
+        self._layer_slots[uuid] = LayerSlot(dataset)
         presentation, reordered_indices = self._insert_layer_with_info(dataset, insert_before=insert_before)
 
         # signal updates from the document
-        self.didAddBasicLayer.emit(reordered_indices, dataset.uuid, presentation)
+        # the layer set keeps updating its prez in place, receivers get their own copy
+        self.didAddBasicLayer.emit(reordered_indices, dataset.uuid, presentation._replace())
         self._add_layer_family(dataset)
         # update any RGBs that could use this to make an RGB
-        self.sync_composite_layer_prereqs([dataset[INFO.SCHED_TIME]])
+        # bulk imports pass sync_composites=False and sync once for all new times
+        if sync_composites:
+            self.sync_composite_layer_prereqs([dataset[INFO.SCHED_TIME]])
 
         return uuid, dataset, active_content_data
 
@@ -1599,12 +1878,15 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         uuids = list(reversed(self.sort_product_uuids(uuids)))
 
         # collect product and resource information but don't yet import content
+        new_times = []
         for dex, uuid in enumerate(uuids):
             if uuid in self._layer_with_uuid:
                 LOG.warning("layer with UUID {} already in document?".format(uuid))
                 self._workspace.get_content(uuid)
             else:
-                self.activate_product_uuid_as_new_layer(uuid, insert_before=insert_before, **importer_kwargs)
+                _, dataset, _ = self.activate_product_uuid_as_new_layer(
+                    uuid, insert_before=insert_before, sync_composites=False, **importer_kwargs)
+                new_times.append(dataset[INFO.SCHED_TIME])
 
             yield {
                 TASK_DOING: 'Loading content {}/{}'.format(dex + 1, total_products),
@@ -1613,6 +1895,10 @@ class Document(QObject):  # base class is rightmost, mixins left of that
                 'num_products': total_products,
             }
 
+        # update any RGBs that could use the new layers, once for the whole batch
+        if new_times:
+            self.sync_composite_layer_prereqs(list(OrderedDict.fromkeys(new_times)))
+
     def sort_paths(self, paths):
         """
         :param paths: list of paths
@@ -1678,13 +1964,29 @@ class Document(QObject):  # base class is rightmost, mixins left of that
     def prez_for_uuids(self, uuids, lset=None):
         if lset is None:
             lset = self.current_layer_set
-        for p in lset:
-            if p.uuid in uuids:
-                yield p
+        if not isinstance(uuids, (set, frozenset, list, tuple)):
+            uuids = tuple(uuids)
+        if 4 * len(uuids) < len(lset):
+            # few uuids: jump straight to their rows
+            u2r = lset.uuid2row
+            seen = set()
+            for u in uuids:
+                row = u2r.get(u)
+                if row is not None and u not in seen:
+                    seen.add(u)
+                    yield lset[row]
+        else:
+            if not isinstance(uuids, (set, frozenset)):
+                uuids = frozenset(uuids)
+            for p in lset:
+                if p.uuid in uuids:
+                    yield p
 
     def prez_for_uuid(self, uuid, lset=None):
-        for p in self.prez_for_uuids((uuid,), lset=lset):
-            return p
+        if lset is None:
+            lset = self.current_layer_set
+        row = lset.uuid2row.get(uuid)
+        return None if row is None else lset[row]
 
     def colormap_for_uuids(self, uuids, lset=None):
         for p in self.prez_for_uuids(uuids, lset=lset):
@@ -1694,70 +1996,84 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         for p in self.colormap_for_uuids((uuid,), lset=lset):
             return p
 
+    def _layer_slot(self, uuid):
+        """Return the LayerSlot for a layer, falling back to a fresh one for layers that are not cached
+        """
+        slot = self._layer_slots.get(uuid)
+        if slot is None:
+            slot = LayerSlot(self._layer_with_uuid[uuid])
+        return slot
+
     def valid_range_for_uuid(self, uuid):
         # Limit ourselves to what information
         # in the future valid range may be different than the default CLIMs
-        return self[uuid][INFO.CLIM]
+        return self._layer_slot(uuid).clim
 
     def convert_value(self, uuid, x, inverse=False):
-        return self[uuid][INFO.UNIT_CONVERSION][1](x, inverse=inverse)
+        return self._layer_slot(uuid).unit_conv[1](x, inverse=inverse)
 
     def format_value(self, uuid, x, numeric=True, units=True):
-        return self[uuid][INFO.UNIT_CONVERSION][2](x, numeric=numeric, units=units)
+        return self._layer_slot(uuid).unit_conv[2](x, numeric=numeric, units=units)
 
     def flipped_for_uuids(self, uuids, lset=None):
         for p in self.prez_for_uuids(uuids, lset=lset):
-            default_clim = self._layer_with_uuid[p.uuid][INFO.CLIM]
-            yield ((p.climits[1] - p.climits[0]) > 0) != ((default_clim[1] - default_clim[0]) > 0)
+            rising = self._layer_slot(p.uuid).clim_rising
+            if rising is None:
+                # RGB climits are per channel and layers without default limits have no direction to compare
+                yield False
+                continue
+            yield (p.climits[1] > p.climits[0]) != rising
 
-    def _get_equalizer_values_image(self, lyr, pinf, xy_pos):
-        value = self._workspace.get_content_point(pinf.uuid, xy_pos)
-        unit_info = lyr[INFO.UNIT_CONVERSION]
-        nc, xc = unit_info[1](np.array(pinf.climits))
-        # calculate normalized bar width relative to its current clim
-        new_value = unit_info[1](value)
-        if nc > xc:  # sometimes clim is swapped to reverse color scale
-            nc, xc = xc, nc
-        if np.isnan(new_value):
-            return None
-        else:
-            if xc == nc:
-                bar_width = 0
-            else:
-                bar_width = (np.clip(new_value, nc, xc) - nc) / (xc - nc)
-            return new_value, bar_width, unit_info[2](new_value, numeric=False)
+    def _get_equalizer_values_images(self, image_layers, xy_pos, zult):
+        """Fill zult with (value, bar_width, text) for a sequence of (slot, prez) image layers.
+        Layers sharing a unit conversion are converted and normalized together in one array pass.
+        """
+        if not image_layers:
+            return
+        try:
+            points = self._workspace.get_content_points([pinf.uuid for _, pinf in image_layers], xy_pos)
+        except ValueError:
+            # one of the layers does not cover xy_pos, sample them separately to find out which
+            points = []
+            for slot, pinf in image_layers:
+                try:
+                    points.append(self._workspace.get_content_points([pinf.uuid], xy_pos)[0])
+                except ValueError:
+                    LOG.warning("Could not get equalizer values for {}".format(pinf.uuid))
+                    zult[pinf.uuid] = (0, 0, 0)
+                    points.append(None)
+        groups = defaultdict(list)
+        for (slot, pinf), value in zip(image_layers, points):
+            if value is not None:
+                groups[slot.unit_conv[1]].append((slot, pinf, value))
+
+        for conv_func, members in groups.items():
+            values = conv_func(np.array([value for _, _, value in members], dtype=np.float64))
+            clims = conv_func(np.array([pinf.climits for _, pinf, _ in members], dtype=np.float64))
+            # sometimes clim is swapped to reverse color scale
+            nc = np.minimum(clims[:, 0], clims[:, 1])
+            xc = np.maximum(clims[:, 0], clims[:, 1])
+            # calculate normalized bar width relative to its current clim
+            with np.errstate(invalid='ignore', divide='ignore'):
+                bar_widths = np.where(xc == nc, 0., (np.clip(values, nc, xc) - nc) / (xc - nc))
+            for (slot, pinf, _), new_value, bar_width in zip(members, values, bar_widths):
+                if np.isnan(new_value):
+                    zult[pinf.uuid] = None
+                else:
+                    zult[pinf.uuid] = (new_value, bar_width, slot.unit_conv[2](new_value, numeric=False))
 
     def _get_equalizer_values_rgb(self, lyr, pinf, xy_pos):
         # We can show a valid RGB
         # Get 3 values for each channel
-        # XXX: Better place for this?
-        def _sci_to_rgb(v, cmin, cmax):
-            if np.isnan(v):
-                return None
-
-            if cmin == cmax:
-                return 0
-            elif cmin > cmax:
-                if v > cmin:
-                    v = cmin
-                elif v < cmax:
-                    v = cmax
-            else:
-                if v < cmin:
-                    v = cmin
-                elif v > cmax:
-                    v = cmax
-
-            return int(round(abs(v - cmin) / abs(cmax - cmin) * 255.))
-        values = []
-        for dep_lyr, clims in zip(lyr.l[:3], pinf.climits):
-            if dep_lyr is None:
-                values.append(None)
-            elif clims is None or clims[0] is None:
-                values.append(None)
-            else:
-                value = self._workspace.get_content_point(dep_lyr[INFO.UUID], xy_pos)
-                values.append(_sci_to_rgb(value, clims[0], clims[1]))
+        channels = list(zip(lyr.l[:3], pinf.climits))
+        values = [None] * len(channels)
+        sampled = [i for i, (dep_lyr, clims) in enumerate(channels)
+                   if dep_lyr is not None and clims is not None and clims[0] is not None]
+        points = self._workspace.get_content_points([channels[i][0][INFO.UUID] for i in sampled], xy_pos)
+        for i, value in zip(sampled, points):
+            clims = channels[i][1]
+            value = _sci_to_rgb(value, float(clims[0]), float(clims[1]))
+            values[i] = value if value >= 0 else None
 
         nc = 0
         xc = 255
@@ -1779,16 +2095,18 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         else:
             uuids = [(pinf.uuid, pinf) for pinf in self.prez_for_uuids(uuids)]
         zult = {}
+        image_layers = []
         for uuid, pinf in uuids:
             try:
-                lyr = self._layer_with_uuid[pinf.uuid]
-                if lyr[INFO.KIND] in {KIND.IMAGE, KIND.COMPOSITE, KIND.CONTOUR}:
-                    zult[pinf.uuid] = self._get_equalizer_values_image(lyr, pinf, xy_pos)
-                elif lyr[INFO.KIND] == KIND.RGB:
-                    zult[pinf.uuid] = self._get_equalizer_values_rgb(lyr, pinf, xy_pos)
+                slot = self._layer_slot(pinf.uuid)
+                if slot.kind in _EQUALIZER_IMAGE_KINDS:
+                    image_layers.append((slot, pinf))
+                elif slot.kind == KIND.RGB:
+                    zult[pinf.uuid] = self._get_equalizer_values_rgb(self._layer_with_uuid[pinf.uuid], pinf, xy_pos)
             except ValueError:
                 LOG.warning("Could not get equalizer values for {}".format(uuid))
                 zult[pinf.uuid] = (0, 0, 0)
+        self._get_equalizer_values_images(image_layers, xy_pos, zult)
 
         self.didCalculateLayerEqualizerValues.emit(zult)  # is picked up by layer list model to update display
 
@@ -1809,24 +2127,23 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         list of UUIDs (top to bottom) currently being displayed, independent of visibility/validity
         :return:
         """
-        return tuple(x.uuid for x in self.current_layer_set)
+        return self.current_layer_set.uuids_snapshot
 
     @property
     def current_visible_layer_uuid(self):
         """
         :return: the topmost visible layer's UUID
         """
-        for x in self.current_layer_set:
-            layer = self._layer_with_uuid[x.uuid]
-            if x.visible and layer.is_valid:
-                return x.uuid
+        for uuid in self.current_visible_layer_uuids:
+            return uuid
         return None
 
     @property
     def current_visible_layer_uuids(self):
-        for x in self.current_layer_set:
-            layer = self._layer_with_uuid[x.uuid]
-            if x.visible and layer.is_valid:
+        L = self.current_layer_set
+        for row in L.visible_rows():
+            x = L[row]
+            if self._layer_with_uuid[x.uuid].is_valid:
                 yield x.uuid
 
     # TODO: add a document style guide which says how different bands from different instruments are displayed
@@ -1838,13 +2155,27 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         typically this is used by the scenegraphmanager to synchronize the scenegraph elements
         :return: sequence of (layer_prez, layer) pairs, with order=0 for non-animating layers
         """
-        for layer_prez in self.current_layer_set:
-            if layer_prez.visible or layer_prez.a_order is not None:
-                layer = self._layer_with_uuid[layer_prez.uuid]
-                if not layer.is_valid:
-                    # we don't have enough information to display this layer yet, it's still loading or being configured
-                    continue
-                yield layer_prez, layer
+        L = self.current_layer_set
+        visible, a_order = L.columns()
+        for row in _scan_active(visible, a_order, self._valid_column(L)):
+            layer_prez = L[row]
+            yield layer_prez, self._layer_with_uuid[layer_prez.uuid]
+
+    def _valid_column(self, lset):
+        """
+        bool array by row of lset, True for layers with enough information to be displayed
+        basic layers are always valid; composites may still be loading or being configured
+        """
+        valid = np.ones(len(lset), dtype=np.bool_)
+        u2r = lset.uuid2row
+        for layer_type, uuids in self._uuids_by_type.items():
+            if layer_type is DocBasicLayer:
+                continue
+            for uuid in uuids:
+                row = u2r.get(uuid)
+                if row is not None:
+                    valid[row] = self._layer_with_uuid[uuid].is_valid
+        return valid
 
     def layers_where(self, is_valid=None, is_active=None, in_type_set=None,
                      have_proj=None):
@@ -1855,7 +2186,18 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         :param in_type_set: None, or set of Python types that the layer falls into
         :return: sequence of layers in no particular order
         """
-        for layer_prez in self.current_layer_set:
+        L = self.current_layer_set
+        if in_type_set is not None:
+            # only consult layers of the requested types
+            by_type = self._uuids_by_type
+            candidates = set().union(*(by_type.get(t, ()) for t in in_type_set))
+            u2r = L.uuid2row
+            prezs = [L[u2r[u]] for u in candidates if u in u2r]
+        elif is_active:
+            prezs = [L[row] for row in L.active_rows()]
+        else:
+            prezs = L
+        for layer_prez in prezs:
             layer = self._layer_with_uuid[layer_prez.uuid]
             valid = layer.is_valid
             if is_valid is not None:
@@ -1900,7 +2242,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         self.didSwitchLayerSet.emit(layer_set_index, self.current_layer_set, self.current_animation_order)
 
     def row_for_uuid(self, *uuids):
-        d = dict((q.uuid,i) for i,q in enumerate(self.current_layer_set))
+        d = self.current_layer_set.uuid2row
         if len(uuids)==1:
             return d[uuids[0]]
         else:
@@ -1912,6 +2254,12 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         :param rows_or_uuids: layer index or index list, 0..n-1, alternately UUIDs of layers
         :param visible: True, False, or None (toggle)
         """
+        self._apply_visibility(self._visibility_changes(rows_or_uuids, visible))
+
+    def _visibility_changes(self, rows_or_uuids, visible=None):
+        """
+        resolve rows or UUIDs and a visibility (None to toggle) into a {uuid: bool} dictionary for _apply_visibility
+        """
         L = self.current_layer_set
         zult = {}
         if isinstance(rows_or_uuids, int) or isinstance(rows_or_uuids, UUID):
@@ -1920,11 +2268,31 @@ class Document(QObject):  # base class is rightmost, mixins left of that
             if isinstance(dex, UUID):
                 dex = L.index(dex)  # returns row index
             old = L[dex]
-            vis = (not old.visible) if visible is None else visible
-            nu = old._replace(visible=vis)
-            L[dex] = nu
-            zult[nu.uuid] = nu.visible
-        self.didChangeLayerVisibility.emit(zult)
+            zult[old.uuid] = (not old.visible) if visible is None else visible
+        return zult
+
+    def _apply_visibility(self, changes, emit=True):
+        """
+        set the visibility of layers in the current layer set, then signal once for the whole batch
+        layers not in the current layer set or already in the requested state are skipped
+        :param changes: dictionary of {uuid:bool} with new visibility state
+        :param emit: False to leave signalling to the caller
+        :return: dictionary of {uuid:bool} for the layers which actually changed
+        """
+        L = self.current_layer_set
+        u2r = L.uuid2row
+        changed = {}
+        for uuid, visible in changes.items():
+            dex = u2r.get(uuid)
+            if dex is None:
+                continue
+            if L[dex].visible == visible:
+                continue
+            L.set_visible(dex, visible)
+            changed[uuid] = visible
+        if emit and changed:
+            self.didChangeLayerVisibility.emit(changed)
+        return changed
 
     def animation_changed_visibility(self, changes):
         """
@@ -1934,13 +2302,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         :param changes: dictionary of {uuid:bool} with new visibility state
         :return:
         """
-        u2r = dict((q.uuid,i) for i,q in enumerate(self.current_layer_set))
-        L = self.current_layer_set
-        for uuid,visible in changes.items():
-            dex = L[uuid]
-            old = L[dex]
-            L[dex] = old._replace(visible=visible)
-        self.didChangeLayerVisibility.emit(changes)
+        self._apply_visibility(changes)
 
     def next_last_step(self, uuid, delta=0, bandwise=False):
         """
@@ -1952,11 +2314,8 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         :param bandwise: True if we want to change by band instead of time
         :return: UUID of new focus layer
         """
-        if bandwise:  # next or last band
-            consult_guide = self.channel_siblings
-        else:
-            consult_guide = self.time_siblings
-        sibs, dex = consult_guide(uuid)
+        sibs, dex = self._siblings_for_step(uuid, bandwise)
+        sibs = list(sibs)
         # LOG.debug('layer {0} family is +{1} of {2!r:s}'.format(uuid, dex, sibs))
         if not sibs:
             LOG.info('nothing to do in next_last_timestep')
@@ -1966,11 +2325,26 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         dex %= len(sibs)
         new_focus = sibs[dex]
         del sibs[dex]
-        if sibs:
-            self.toggle_layer_visibility(sibs, False)
-        self.toggle_layer_visibility(new_focus, True) # FUTURE: do these two commands in one step
+        changes = self._visibility_changes(sibs, False) if sibs else {}
+        changes.update(self._visibility_changes(new_focus, True))
+        self._apply_visibility(changes)
         return new_focus
 
+    def _siblings_for_step(self, uuid, bandwise):
+        """
+        cached channel_siblings or time_siblings result, for next_last_step and the sibling-wide changes
+        the whole sibling group is indexed at once, so stepping through it does not rescan the document
+        """
+        zult = self._sibling_index.get((bandwise, uuid))
+        if zult is None:
+            consult_guide = self.channel_siblings if bandwise else self.time_siblings
+            sibs, dex = consult_guide(uuid) or ([], 0)
+            sibs = tuple(sibs)
+            for i, u in enumerate(sibs):
+                self._sibling_index[(bandwise, u)] = (sibs, i)
+            zult = self._sibling_index[(bandwise, uuid)] = (sibs, dex)
+        return zult
+
     def is_layer_visible(self, row):
         return self.current_layer_set[row].visible
 
@@ -1988,38 +2362,50 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         self.didChangeLayerName.emit(uuid, new_name)
 
     def change_colormap_for_layers(self, name, uuids=None):
+        if isinstance(name, str):
+            # colormap names are shared by many prez, keep one copy of each
+            name = sys.intern(name)
         L = self.current_layer_set
         if uuids is not None:
             uuids = self.time_siblings_uuids(uuids)
         else:  # all data layers
-            uuids = [pinfo.uuid for pinfo in L]
-
-        nfo = {}
-        for uuid in uuids:
-            for dex,pinfo in enumerate(L):
-                if pinfo.uuid==uuid:
-                    L[dex] = pinfo._replace(colormap=name)
-                    nfo[uuid] = name
+            uuids = L.uuids_snapshot
+
+        u2r = L.uuid2row
+        # duplicate siblings collapse here, so each row is replaced once
+        nfo = {uuid: name for uuid in uuids if uuid in u2r}
+        for uuid in nfo:
+            dex = u2r[uuid]
+            L[dex] = L[dex]._replace(colormap=name)
         self.didChangeColormap.emit(nfo)
 
     def current_layers_where(self, kinds=None, bands=None, uuids=None,
                              dataset_names=None, wavelengths=None, colormaps=None):
         """check current layer list for criteria and yield"""
         L = self.current_layer_set
-        for idx,p in enumerate(L):
-            if (uuids is not None) and (p.uuid not in uuids):
-                continue
-            layer = self._layer_with_uuid[p.uuid]
-            if (kinds is not None) and (layer.kind not in kinds):
+        if kinds is not None:
+            # layer kinds are fixed at creation, so only layers of those kinds need visiting
+            kind_uuids = self._uuids_of_kinds(kinds)
+            uuids = kind_uuids if uuids is None else kind_uuids.intersection(uuids)
+        if uuids is not None:
+            # visit only the requested rows, still top to bottom
+            u2r = L.uuid2row
+            rows = sorted(set(u2r[u] for u in uuids if u in u2r))
+        else:
+            rows = range(len(L))
+        lwu = self._layer_with_uuid
+        for idx in rows:
+            p = L[idx]
+            # kinds were already applied through the kind index; test the prez before touching the layer
+            if (colormaps is not None) and (p.colormap not in colormaps):
                 continue
+            layer = lwu[p.uuid]
             if (bands is not None) and (layer[INFO.BAND] not in bands):
                 continue
             if (dataset_names is not None) and (layer[INFO.DATASET_NAME] not in dataset_names):
                 continue
             if (wavelengths is not None) and (layer.get(INFO.CENTRAL_WAVELENGTH) not in wavelengths):
                 continue
-            if (colormaps is not None) and (p.colormap not in colormaps):
-                continue
             yield (idx, p, layer)
 
     def change_clims_for_layers_where(self, clims, **query):
@@ -2029,16 +2415,45 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         :param query: see current_layers_where()
         :return:
         """
+        # recipes hand in their own limits list and update it in place later, keep a snapshot of its values
+        clims = tuple(clims)
         nfo = {}
         L = self.current_layer_set
         for idx, pz, layer in self.current_layers_where(**query):
+            if pz.climits == clims:
+                continue
             new_pz = pz._replace(climits=clims)
             nfo[layer.uuid] = new_pz.climits
             L[idx] = new_pz
-        self.didChangeColorLimits.emit(nfo)
+        self._emit_color_limits(nfo)
+
+    def _emit_color_limits(self, nfo):
+        """Emit didChangeColorLimits for `nfo`, or merge it into the pending batch if one is open."""
+        if self._pending_clims is not None:
+            self._pending_clims.update(nfo)
+        elif nfo:
+            self.didChangeColorLimits.emit(nfo)
+
+    @contextmanager
+    def _batch_color_limits(self):
+        """Collect color limit changes made inside the block and emit them as one didChangeColorLimits.
+
+        The last limits set for a uuid win. Nested blocks defer to the outermost one.
+        """
+        if self._pending_clims is not None:
+            yield
+            return
+        self._pending_clims = {}
+        try:
+            yield
+            nfo = self._pending_clims
+        finally:
+            self._pending_clims = None
+        if nfo:
+            self.didChangeColorLimits.emit(nfo)
 
     def change_clims_for_siblings(self, uuid, clims):
-        uuids = self.time_siblings(uuid)[0]
+        uuids = self._siblings_for_step(uuid, False)[0]
         return self.change_clims_for_layers_where(clims, uuids=uuids)
 
     def flip_climits_for_layers(self, uuids=None):
@@ -2046,15 +2461,18 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         if uuids is not None:
             uuids = self.time_siblings_uuids(uuids)
         else:  # all data layers
-            uuids = [pinfo.uuid for pinfo in L]
+            uuids = L.uuids_snapshot
 
         nfo = {}
+        u2r = L.uuid2row
         for uuid in uuids:
-            for dex,pinfo in enumerate(L):
-                if pinfo.uuid == uuid:
-                    nfo[uuid] = pinfo.climits[::-1]
-                    L[dex] = pinfo._replace(climits=nfo[uuid])
-        self.didChangeColorLimits.emit(nfo)
+            dex = u2r.get(uuid)
+            if dex is None:
+                continue
+            pinfo = L[dex]
+            nfo[uuid] = pinfo.climits[::-1]
+            L[dex] = pinfo._replace(climits=nfo[uuid])
+        self._emit_color_limits(nfo)
 
     def change_gamma_for_layers_where(self, gamma, **query):
         nfo = {}
@@ -2066,7 +2484,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         self.didChangeGamma.emit(nfo)
 
     def change_gamma_for_siblings(self, uuid, gamma):
-        uuids = self.time_siblings(uuid)[0]
+        uuids = self._siblings_for_step(uuid, False)[0]
         return self.change_gamma_for_layers_where(gamma, uuids=uuids)
 
     def change_layers_image_kind(self, uuids, new_kind):
@@ -2083,7 +2501,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
                 LOG.warning("Can't change image kind for KIND: %s", pz.kind.name)
                 continue
             new_pz = pz._replace(kind=new_kind)
-            nfo[layer.uuid] = new_pz
+            nfo[layer.uuid] = new_pz._replace()
             layer_set[idx] = new_pz
         self.didChangeImageKind.emit(nfo)
 
@@ -2120,14 +2538,15 @@ class Document(QObject):  # base class is rightmost, mixins left of that
             LOG.info("Creating algebraic layer '{}' for time {:%Y-%m-%d %H:%M:%S}".format(info.get(INFO.SHORT_NAME), self[time_master[idx]].get(INFO.SCHED_TIME)))
 
             uuid, layer_info, data = self._workspace.create_algebraic_composite(operations, temp_namespace, info.copy())
-            self._layer_with_uuid[uuid] = dataset = DocBasicLayer(self, layer_info)
+            dataset = self._add_layer(uuid, DocBasicLayer(self, layer_info))
             presentation, reordered_indices = self._insert_layer_with_info(dataset, insert_before=insert_before)
             if INFO.UNIT_CONVERSION not in dataset:
                 dataset[INFO.UNIT_CONVERSION] = units_conversion(dataset)
             if INFO.FAMILY not in dataset:
                 dataset[INFO.FAMILY] = self.family_for_product_or_layer(dataset)
+            self._layer_slots[uuid] = LayerSlot(dataset)
             self._add_layer_family(dataset)
-            self.didAddCompositeLayer.emit(reordered_indices, dataset.uuid, presentation)
+            self.didAddCompositeLayer.emit(reordered_indices, dataset.uuid, presentation._replace())
 
     def available_rgb_components(self):
         non_rgb_classes = [DocBasicLayer, DocCompositeLayer]
@@ -2173,7 +2592,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
             self.update_rgb_composite_layers(recipe, rgba=set(rgba.keys()))
 
     def _uuids_for_recipe(self, recipe, valid_only=True):
-        prez_uuids = self.current_layer_uuid_order
+        prez_uuids = self.current_layer_set.uuid2row
         for inst_key, time_layers in self._recipe_layers[recipe.name].items():
             for t, rgb_layer in time_layers.items():
                 u = rgb_layer[INFO.UUID]
@@ -2209,7 +2628,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         """
         # find all the layer combinations
         changed_uuids = []
-        prez_uuids = self.current_layer_uuid_order
+        prez_uuids = set(self.current_layer_set.uuid2row)
         for t, category, r, g, b in self._composite_layers(recipe, times=times, rgba=rgba):
             # (sat, inst) -> {time -> layer}
             layers = self._recipe_layers[recipe.name].setdefault(category, {})
@@ -2226,7 +2645,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
                 ds_info[INFO.FAMILY] = self.family_for_product_or_layer(ds_info)
                 LOG.debug("Creating new RGB layer for recipe '{}'".format(recipe.name))
                 rgb_layer = layers[t] = DocRGBLayer(self, recipe, ds_info)
-                self._layer_with_uuid[uuid] = rgb_layer
+                self._add_layer(uuid, rgb_layer)
                 layers[t].update_metadata_from_dependencies()
                 # maybe we shouldn't add the family until the layers are set
                 self._add_layer_family(rgb_layer)
@@ -2258,7 +2677,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
             if rgb_layer[INFO.UUID] not in prez_uuids:
                 if should_show:
                     presentation, reordered_indices = self._insert_layer_with_info(rgb_layer)
-                    self.didAddCompositeLayer.emit(reordered_indices, rgb_layer[INFO.UUID], presentation)
+                    self.didAddCompositeLayer.emit(reordered_indices, rgb_layer[INFO.UUID], presentation._replace())
                 else:
                     continue
             elif not should_show:
@@ -2274,7 +2693,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         if changed_uuids:
             # self.didChangeComposition.emit((), layer.uuid, prez, rgba)
             self.didChangeCompositions.emit((), changed_uuids,
-                                            list(self.prez_for_uuids(changed_uuids)))
+                                            [p._replace() for p in self.prez_for_uuids(changed_uuids)])
 
     def _composite_layers(self, recipe, times=None, rgba=None):
         if times:
@@ -2282,33 +2701,33 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         if rgba is None:
             rgba = []
 
-        def _key_func(x):
-            return x[INFO.CATEGORY]
+        # components often share a family, so each family's (sat, inst) -> {time -> layer} is built once per call
+        inst_layers_for_family = {}
 
         def _component_generator(family, this_rgba):
             # limit what layers are returned
             if this_rgba not in rgba:
                 return {}
 
-            # FIXME: Should we use SERIAL instead?
-            #        Algebraic layers and RGBs need to use the same thing
-            #        Any call to 'sync_composite_layer_prereqs' needs to use
-            #        SERIAL instead of SCHED_TIME too.
-            if family is None:
-                layers = self.current_layers_where(kinds=[KIND.IMAGE, KIND.COMPOSITE])
-                layers = (x[-1] for x in layers)
-                # return empty `None` layers since we don't know what is wanted right now
-                # we look at all possible times
-                inst_layers = {
-                    k: {l[INFO.SCHED_TIME]: None for l in g}
-                    for k, g in groupby(sorted(layers, key=_key_func), _key_func)}
-                return inst_layers
-            else:
-                family_uuids = self._families[family]
-                family_layers = [self[u] for u in family_uuids]
-            # (sat, inst) -> {time -> layer}
-            inst_layers = {k: {l[INFO.SCHED_TIME]: l for l in g} for k, g in groupby(sorted(family_layers, key=_key_func), _key_func)}
-            return inst_layers
+            inst_layers = inst_layers_for_family.get(family)
+            if inst_layers is None:
+                inst_layers = defaultdict(dict)
+                # FIXME: Should we use SERIAL instead?
+                #        Algebraic layers and RGBs need to use the same thing
+                #        Any call to 'sync_composite_layer_prereqs' needs to use
+                #        SERIAL instead of SCHED_TIME too.
+                if family is None:
+                    # return empty `None` layers since we don't know what is wanted right now
+                    # we look at all possible times
+                    for _, _, l in self.current_layers_where(kinds=[KIND.IMAGE, KIND.COMPOSITE]):
+                        inst_layers[l[INFO.CATEGORY]][l[INFO.SCHED_TIME]] = None
+                else:
+                    for u in self._families[family]:
+                        l = self[u]
+                        inst_layers[l[INFO.CATEGORY]][l[INFO.SCHED_TIME]] = l
+                inst_layers_for_family[family] = inst_layers
+            # callers add categories to the outer dict, so each component gets its own
+            return dict(inst_layers)
 
         # if the layers we were using as dependencies have all been removed (family no longer exists)
         # then change the recipe to use None instead. The `didRemoveFamily` signal already told the
@@ -2345,9 +2764,10 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         # update the layer object with newly available layers if possible
         # add the layer object to the document if it should be included with
         # the rest of them
-        for recipe_name, inst_rgbs in self._recipe_layers.items():
-            recipe = self.recipe_manager[recipe_name]
-            self.update_rgb_composite_layers(recipe, times=new_times)
+        with self._batch_color_limits():
+            for recipe_name, inst_rgbs in self._recipe_layers.items():
+                recipe = self.recipe_manager[recipe_name]
+                self.update_rgb_composite_layers(recipe, times=new_times)
 
     def _change_rgb_component_layer(self, layer:DocRGBLayer, **rgba):
         """Update RGB Layer with specified components
@@ -2365,7 +2785,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         clims = list(layer[INFO.CLIM])
         for k, v in rgba.items():
             # assert(k in 'rgba')
-            idx = 'rgba'.index(k)
+            idx = _RGBA_INDEX[k]
             if getattr(layer, k, None) is v:
                 continue
             changed.append(k)
@@ -2377,24 +2797,71 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         # These clims are the current state of the default clims for each sub-layer
         layer[INFO.CLIM] = tuple(clims)
         updated = layer.update_metadata_from_dependencies()
+        self._sibling_index.clear()  # names and times used to find siblings may have changed
+        self._time_order = None
         LOG.info('updated metadata for layer %s: %s' % (layer.uuid, repr(list(updated.keys()))))
         return changed
 
     def set_rgb_range(self, recipe:CompositeRecipe, rgba:str, min:float, max:float):
-        new_clims = tuple(x if c != rgba else (min, max) for c, x in zip("rgba", recipe.color_limits))
+        new_clims = list(recipe.color_limits)
+        idx = _RGBA_INDEX[rgba]
+        if idx < len(new_clims):
+            new_clims[idx] = (min, max)
+        new_clims = tuple(new_clims)
         # update the ranges on this layer and all it's siblings
         self.change_rgb_recipe_prez(recipe, climits=new_clims)
 
+    def _add_layer(self, uuid, layer):
+        """record a new document layer along with the indexes kept on it
+        :return: layer
+        """
+        self._layer_with_uuid[uuid] = layer
+        self._uuids_by_type[type(layer)].add(uuid)
+        self._uuids_by_kind[layer.kind].add(uuid)
+        self._sibling_index.clear()
+        self._time_order = None
+        return layer
+
+    def _forget_layer(self, uuid):
+        """drop a document layer and everything indexed or cached on it"""
+        layer = self._layer_with_uuid.pop(uuid)
+        self._uuids_by_type[type(layer)].discard(uuid)
+        self._uuids_by_kind[layer.kind].discard(uuid)
+        self._sibling_index.clear()
+        self._time_order = None
+        self._layer_slots.pop(uuid, None)
+        self.as_layer_stack.forget_units_for_uuid(uuid)
+
+    def _uuids_in_time_order(self):
+        """uuids of all document layers sorted by (sched_time, uuid), kept until a layer is added, removed or updated
+        layers without a sched_time sort last
+        """
+        if self._time_order is None:
+            def _key(item):
+                t = item[1].get(INFO.SCHED_TIME)
+                return (t is None, t or datetime.min, item[0])
+            self._time_order = [u for u, _ in sorted(self._layer_with_uuid.items(), key=_key)]
+        return self._time_order
+
+    def _uuids_of_kinds(self, kinds):
+        by_kind = self._uuids_by_kind
+        return set().union(*(by_kind.get(k, ()) for k in kinds))
+
     def _directory_of_layers(self, kind=KIND.IMAGE):
         if not isinstance(kind, (list, tuple)):
             kind = [kind]
-        for x in [q for q in self._layer_with_uuid.values() if q.kind in kind]:
-            yield x.uuid, x.sched_time, x.product_family_key
+        lwu = self._layer_with_uuid
+        by_kind = self._uuids_by_kind
+        # a layer has exactly one kind, so the per-kind sets need no union; snapshot each so callers may add layers
+        for k in OrderedDict.fromkeys(kind):
+            for uuid in tuple(by_kind.get(k, ())):
+                x = lwu[uuid]
+                yield x.uuid, x.sched_time, x.product_family_key
 
     def filter_active_layers(self, uuids):
         """Trim a sequence of product uuids to only the ones loaded in document
         """
-        docset = set(x.uuid for x in self._layer_with_uuid.values())
+        docset = self._layer_with_uuid
         for uuid in uuids:
             if uuid in docset:
                 yield uuid
@@ -2447,6 +2914,12 @@ class Document(QObject):  # base class is rightmost, mixins left of that
             # remove from the layer set
             self.remove_layer_prez(uuid)  # this will send signal and start purge
 
+        # drop them from the inactive layer sets as well, walking each set once
+        for dex, layer_set in enumerate(self._layer_sets):
+            if dex == self.current_set_index or layer_set is None:
+                continue
+            layer_set.remove_uuids(all_uuids)
+
         # remove recipes for RGBs that were deleted
         # if we don't then they may be recreated below
         self.remove_rgb_recipes(recipes_to_remove)
@@ -2463,7 +2936,11 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         L = self.current_layer_set
 
         if isinstance(layer, DocRGBLayer):
-            new_anim_uuids = tuple(self._uuids_for_recipe(layer.recipe))
+            # recipe layers are kept per category, so put them in time order with one sort over all of them
+            lwu = self._layer_with_uuid
+            by_time = [(lwu[u].get(INFO.SCHED_TIME), u) for u in self._uuids_for_recipe(layer.recipe)]
+            by_time.sort(key=lambda tu: (tu[0] is None, tu[0] or datetime.min, tu[1]))
+            new_anim_uuids = tuple(u for _, u in by_time)
         else:
             new_anim_uuids, _ = self.time_siblings(uuid)
             if new_anim_uuids is None or len(new_anim_uuids) < 2:
@@ -2474,8 +2951,10 @@ class Document(QObject):  # base class is rightmost, mixins left of that
                 return []
 
         LOG.debug('new animation order will be {0!r:s}'.format(new_anim_uuids))
-        L.animation_order = new_anim_uuids
-        self.didReorderAnimation.emit(tuple(new_anim_uuids))
+        new_anim_uuids = tuple(new_anim_uuids)
+        if new_anim_uuids != L.animation_order:
+            L.animation_order = new_anim_uuids
+            self.didReorderAnimation.emit(new_anim_uuids)
         return new_anim_uuids
 
     def get_info(self, row=None, uuid=None):
@@ -2526,19 +3005,18 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         self.didReorderLayers.emit(tuple(new_order))
 
     def insert_layer_prez(self, row:int, layer_prez_seq):
-        cls = self.current_layer_set
-        clo = list(range(len(cls)))
         lps = list(layer_prez_seq)
-        lps.reverse()
         if not lps:
             LOG.warning('attempt to drop empty content')
             return
+        drops = []
         for p in lps:
             if not isinstance(p, prez):
                 LOG.error('attempt to drop a new layer with the wrong type: {0!r:s}'.format(p))
                 continue
-            cls.insert(row, p)
-            clo.insert(row, None)
+            drops.append(p)
+        # one splice, so rows below the drop point are shifted and re-indexed once
+        self.current_layer_set.bulk_insert(row, drops)
 
     def is_using(self, uuid:UUID, layer_set:int=None):
         "return true if this dataset is still in use in one of the layer sets"
@@ -2547,13 +3025,13 @@ class Document(QObject):  # base class is rightmost, mixins left of that
             lss = [self._layer_sets[layer_set]]
         else:
             lss = [q for q in self._layer_sets if q is not None]
-        for ls in lss:
-            for p in ls:
-                if p.uuid == uuid:
-                    return True
-                parent_layer = self._layer_with_uuid[p.uuid]
-                if parent_layer.kind == KIND.RGB and layer in parent_layer.l:
-                    return True
+        # each layer set's uuid2row already counts the presentations using a uuid
+        if any(uuid in ls.uuid2row for ls in lss):
+            return True
+        # RGB layers still presented keep their component layers in use
+        for rgb_uuid in self._uuids_by_kind.get(KIND.RGB, ()):
+            if layer in self._layer_with_uuid[rgb_uuid].l and any(rgb_uuid in ls.uuid2row for ls in lss):
+                return True
         return False
 
     def remove_layer_prez(self, row_or_uuid, count:int=1):
@@ -2586,7 +3064,7 @@ class Document(QObject):  # base class is rightmost, mixins left of that
                 LOG.info('purging layer {}, no longer in use'.format(uuid))
                 self.willPurgeLayer.emit(uuid)
                 # remove from our bookkeeping
-                del self._layer_with_uuid[uuid]
+                self._forget_layer(uuid)
                 # remove from workspace
                 self._workspace.remove(uuid)
 
@@ -2604,22 +3082,23 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         if it is None:
             return None
         sibs = [(x[INFO.SHORT_NAME], x[INFO.UUID]) for x in
-                self._filter(sibling_infos.values(), it, {INFO.SCENE, INFO.SCHED_TIME, INFO.INSTRUMENT, INFO.PLATFORM})]
+                self._filter(sibling_infos.values(), it, (INFO.SCHED_TIME, INFO.INSTRUMENT, INFO.PLATFORM, INFO.SCENE))]
         # then sort it by bands
         sibs.sort()
         offset = [i for i, x in enumerate(sibs) if x[1] == uuid]
         return [x[1] for x in sibs], offset[0]
 
     def _filter(self, seq, reference, keys):
-        "filter a sequence of metadata dictionaries to matching keys with reference"
+        """filter a sequence of metadata dictionaries to matching keys with reference
+        keys are tested in the order given and a candidate is dropped at its first mismatch,
+        so callers should list the key that rules out the most candidates first
+        """
+        wanted = [(key, reference.get(key, None)) for key in keys]
         for md in seq:
-            fail = False
-            for key in keys:
-                val = reference.get(key, None)
-                v = md.get(key, None)
-                if val != v:
-                    fail=True
-            if not fail:
+            for key, val in wanted:
+                if md.get(key, None) != val:
+                    break
+            else:
                 yield md
 
     def time_siblings(self, uuid, sibling_infos=None):
@@ -2629,13 +3108,20 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         :param sibling_infos: dictionary of UUID -> Dataset Info to sort through
         :return: sorted list of sibling uuids in time order, index of where uuid is in the list
         """
+        keys = (INFO.SHORT_NAME, INFO.STANDARD_NAME, INFO.INSTRUMENT, INFO.PLATFORM, INFO.SCENE, INFO.KIND)
         if sibling_infos is None:
-            sibling_infos = self._layer_with_uuid
+            # walk the document's time-sorted layer list instead of sorting on every call
+            it = self._layer_with_uuid.get(uuid, None)
+            if it is None:
+                return [], 0
+            lwu = self._layer_with_uuid
+            sibs = [x[INFO.UUID] for x in self._filter((lwu[u] for u in self._uuids_in_time_order()), it, keys)]
+            return sibs, sibs.index(uuid)
         it = sibling_infos.get(uuid, None)
         if it is None:
             return [], 0
         sibs = [(x[INFO.SCHED_TIME], x[INFO.UUID]) for x in
-                self._filter(sibling_infos.values(), it, {INFO.SHORT_NAME, INFO.STANDARD_NAME, INFO.SCENE, INFO.INSTRUMENT, INFO.PLATFORM, INFO.KIND})]
+                self._filter(sibling_infos.values(), it, keys)]
         # then sort it into time order
         sibs.sort()
         offset = [i for i,x in enumerate(sibs) if x[1]==uuid]
@@ -2649,7 +3135,12 @@ class Document(QObject):  # base class is rightmost, mixins left of that
         :return: generate sorted list of sibling uuids in time order and in provided uuid order
         """
         for requested_uuid in uuids:
-            for sibling_uuid in self.time_siblings(requested_uuid, sibling_infos=sibling_infos)[0]:
+            if sibling_infos is None:
+                # document layers: reuse sibling groups until a layer is added, removed or updated
+                sibs = self._siblings_for_step(requested_uuid, False)[0]
+            else:
+                sibs = self.time_siblings(requested_uuid, sibling_infos=sibling_infos)[0]
+            for sibling_uuid in sibs:
                 yield sibling_uuid
 
 
@@ -2681,6 +3172,155 @@ class Document(QObject):  # base class is rightmost, mixins left of that
 #
 
 
+# ============================
+# support and testing routines
+
+class tests(unittest.TestCase):
+    def setUp(self):
+        class StubDocument(Document):
+            def __init__(self):
+                pass  # no workspace or signals, a layer set only holds a weak reference to its document
+        self.doc = StubDocument()
+        self.stack = DocLayerStack(self.doc)
+
+    def _prez(self, visible=True, a_order=None):
+        return prez(uuid=uuidgen(), kind=KIND.IMAGE, visible=visible, a_order=a_order,
+                    colormap='grays', climits=(0., 1.), gamma=1., mixing=Mixing.NORMAL)
+
+    def _fill(self, n):
+        ps = [self._prez(visible=bool(i % 2), a_order=(n - i if i % 3 == 0 else None)) for i in range(n)]
+        for p in ps:
+            self.stack.append(p)
+        return ps
+
+    def assertColumnsMatch(self, stack):
+        store = list(stack)
+        self.assertEqual(len(stack), len(store))
+        self.assertEqual(stack.uuid2row, dict((p.uuid, row) for row, p in enumerate(store)))
+        visible, a_order = stack.columns()
+        self.assertEqual(visible.tolist(), [int(bool(p.visible)) for p in store])
+        self.assertEqual(a_order.tolist(), [-1 if p.a_order is None else p.a_order for p in store])
+        self.assertEqual(stack.active_rows(),
+                         [row for row, p in enumerate(store) if p.visible or p.a_order is not None])
+        self.assertEqual(stack.visible_rows(), [row for row, p in enumerate(store) if p.visible])
+        animating = sorted((p.a_order, p.uuid) for p in store if p.a_order is not None)
+        self.assertEqual(stack.animation_order, tuple(u for _, u in animating))
+
+    def test_insert(self):
+        ps = self._fill(5)
+        self.assertColumnsMatch(self.stack)
+        p = self._prez(a_order=7)
+        self.stack.insert(2, p)
+        self.assertIs(self.stack[2], p)
+        self.assertEqual(self.stack[p.uuid], 2)
+        self.assertColumnsMatch(self.stack)
+        self.stack.insert(-100, self._prez(visible=False))
+        self.stack.insert(100, self._prez())
+        self.assertColumnsMatch(self.stack)
+        self.assertEqual(list(self.stack)[1:3], ps[:2])
+
+    def test_columns_grow(self):
+        self._fill(40)
+        self.assertColumnsMatch(self.stack)
+
+    def test_bulk_insert(self):
+        ps = self._fill(4)
+        drops = [self._prez(visible=False, a_order=9), self._prez(), self._prez(a_order=8)]
+        self.stack.bulk_insert(1, drops)
+        self.assertEqual(list(self.stack), ps[:1] + drops + ps[1:])
+        self.assertColumnsMatch(self.stack)
+        self.stack.bulk_insert(0, [])
+        self.assertEqual(len(self.stack), 7)
+        q = self._prez(visible=False)
+        self.stack.bulk_insert(-1, [q])
+        self.assertIs(self.stack[-2], q)
+        self.assertColumnsMatch(self.stack)
+
+    def test_delete(self):
+        ps = self._fill(8)
+        del self.stack[0]
+        self.assertColumnsMatch(self.stack)
+        del self.stack[-1]
+        del self.stack[1:3]
+        self.assertColumnsMatch(self.stack)
+        self.assertEqual(list(self.stack), [ps[1], ps[4], ps[5], ps[6]])
+        del self.stack[::2]
+        self.assertColumnsMatch(self.stack)
+        self.assertEqual(list(self.stack), [ps[4], ps[6]])
+        self.assertIs(self.stack.pop(0), ps[4])
+        self.assertColumnsMatch(self.stack)
+        self.assertNotIn(ps[0].uuid, self.stack)
+
+    def test_remove_uuids(self):
+        ps = self._fill(7)
+        self.assertEqual(self.stack.remove_uuids([ps[0].uuid, ps[3].uuid, ps[4].uuid, uuidgen()]), 3)
+        self.assertEqual(list(self.stack), [ps[1], ps[2], ps[5], ps[6]])
+        self.assertColumnsMatch(self.stack)
+        self.assertEqual(self.stack.remove_uuids(set()), 0)
+        self.assertColumnsMatch(self.stack)
+
+    def test_setitem(self):
+        ps = self._fill(4)
+        self.stack[1] = ps[1]._replace(visible=True, a_order=0)
+        self.assertColumnsMatch(self.stack)
+        self.stack[2] = self._prez(a_order=3)
+        self.assertNotIn(ps[2].uuid, self.stack)
+        self.assertColumnsMatch(self.stack)
+
+    def test_uuids_snapshot(self):
+        ps = self._fill(4)
+        snap = self.stack.uuids_snapshot
+        self.assertEqual(snap, tuple(p.uuid for p in ps))
+        self.stack.set_visible(0, True)
+        self.stack[1] = ps[1]._replace(gamma=2.)
+        self.assertIs(self.stack.uuids_snapshot, snap)
+        self.stack.change_order_by_indices([3, 2, 1, 0])
+        self.assertEqual(self.stack.uuids_snapshot, snap[::-1])
+        p = self._prez()
+        self.stack[0] = p
+        self.assertEqual(self.stack.uuids_snapshot[0], p.uuid)
+        del self.stack[0]
+        self.stack.insert(1, p)
+        self.assertEqual(self.stack.uuids_snapshot, tuple(q.uuid for q in self.stack))
+
+    def test_reorder(self):
+        ps = self._fill(5)
+        self.stack.change_order_by_indices([4, 2, 0, 1, 3])
+        self.assertEqual(list(self.stack), [ps[4], ps[2], ps[0], ps[1], ps[3]])
+        self.assertColumnsMatch(self.stack)
+
+    def test_set_visible_and_a_order(self):
+        self._fill(5)
+        self.stack.set_visible(0, True)
+        self.stack.set_visible(1, False)
+        self.stack.set_a_order(1, 0)
+        self.stack.set_a_order(0, None)
+        self.assertColumnsMatch(self.stack)
+        self.stack.clear_animation_order()
+        self.assertEqual(self.stack.animation_order, ())
+        self.assertColumnsMatch(self.stack)
+
+    def test_cloned_set_is_independent(self):
+        ps = self._fill(3)
+        clone = DocLayerStack(self.stack)
+        clone.set_visible(0, True)
+        clone.set_a_order(1, 0)
+        self.assertFalse(ps[0].visible)
+        self.assertIsNone(ps[1].a_order)
+        self.assertFalse(self.stack[0].visible)
+        self.assertEqual(self.stack.animation_order, (ps[0].uuid,))
+        self.assertEqual(clone.animation_order, (ps[1].uuid, ps[0].uuid))
+        self.assertColumnsMatch(self.stack)
+        self.assertColumnsMatch(clone)
+
+    def test_animation_order(self):
+        ps = self._fill(6)
+        self.stack.animation_order = [ps[5].uuid, ps[1].uuid, ps[2].uuid]
+        self.assertEqual(self.stack.animation_order, (ps[5].uuid, ps[1].uuid, ps[2].uuid))
+        self.assertEqual([p.a_order for p in self.stack], [None, 1, 2, None, None, 0])
+        self.assertColumnsMatch(self.stack)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="PURPOSE",
@@ -22,10 +22,14 @@ REQUIRES
 :license: GPLv3, see LICENSE for more details
 """
 
+import os
 import sys
+import atexit
 import logging
+import threading
 import unittest
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 import shapefile
 
@@ -64,6 +68,38 @@ LOG = logging.getLogger(__name__)
 # these values can get large when zoomed way in
 CANVAS_EPSILON = 1e5
 # CANVAS_EPSILON = 1e30
+# rows per band when copying content for retiling, see _paged_copy
+COPY_BAND_ROWS = 256
+# new tiles are copied as one bounding region unless it is this many times the area of the tiles themselves
+COPY_REGION_MAX_WASTE = 2.
+# copying out of memory-mapped content releases the GIL, so bands can be paged in concurrently
+_COPY_POOL = None  # ThreadPoolExecutor created by the first _paged_copy that needs it
+_COPY_POOL_LOCK = threading.Lock()
+
+
+def _copy_pool():
+    global _COPY_POOL
+    with _COPY_POOL_LOCK:
+        if _COPY_POOL is None:
+            _COPY_POOL = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+            atexit.register(_COPY_POOL.shutdown, wait=False)
+        return _COPY_POOL
+
+
+def _paged_copy(src, dtype=np.float32):
+    """Copy a (possibly memory-mapped, strided) 2D array in to a new contiguous array, in parallel row bands.
+    """
+    out = np.empty(src.shape, dtype=dtype)
+    bands = range(0, src.shape[0], COPY_BAND_ROWS)
+    if len(bands) <= 1:
+        out[...] = src
+        return out
+
+    def _copy_band(y):
+        np.copyto(out[y:y + COPY_BAND_ROWS], src[y:y + COPY_BAND_ROWS])
+    # list() so that exceptions from the bands are raised here
+    list(_copy_pool().map(_copy_band, bands))
+    return out
 
 
 class ArrayProxy(object):
@@ -451,7 +487,7 @@ class TiledGeolocatedImageVisual(ImageVisual):
 
         LOG.debug("Uploading texture data for %d tiles (%r)", (tile_box.b - tile_box.t) * (tile_box.r - tile_box.l), tile_box)
         # Tiles start at upper-left so go from top to bottom
-        tiles_info = []
+        new_tiles = []
         for tiy in range(tile_box.t, tile_box.b):
             for tix in range(tile_box.l, tile_box.r):
                 already_in = (stride, tiy, tix) in self.texture_state
@@ -459,16 +495,35 @@ class TiledGeolocatedImageVisual(ImageVisual):
                 # Assume that texture_state does not change from the main thread if this is run in another
                 tex_tile_idx = self.texture_state.add_tile((stride, tiy, tix))
                 if already_in:
-                    # FIXME: we should make a list/set of the tiles we need to add before this
                     continue
-
                 # Assume we were given a total image worth of this stride
                 y_slice, x_slice = self.calc.calc_tile_slice(tiy, tix, stride)
-                # force a copy of the data from the content array (provided by the workspace) to a vispy-compatible contiguous float array
-                # this can be a potentially time-expensive operation since content array is often huge and always memory-mapped, so paging may occur
-                # we don't want this paging deferred until we're back in the GUI thread pushing data to OpenGL!
-                tile_data = np.array(data[y_slice, x_slice], dtype=np.float32)
-                tiles_info.append((stride, tiy, tix, tex_tile_idx, tile_data))
+                new_tiles.append((tiy, tix, tex_tile_idx, y_slice, x_slice))
+
+        tiles_info = []
+        if not new_tiles:
+            return tiles_info
+
+        # force a single copy of the region covered by the new tiles from the content array (provided by the workspace)
+        # to a contiguous float array; the tiles are then cut from memory instead of re-reading the strided content
+        # this can be a potentially time-expensive operation since content array is often huge and always memory-mapped, so paging may occur
+        # we don't want this paging deferred until we're back in the GUI thread pushing data to OpenGL!
+        y0 = min(t[3].start for t in new_tiles)
+        x0 = min(t[4].start for t in new_tiles)
+        y1 = max(t[3].stop for t in new_tiles)
+        x1 = max(t[4].stop for t in new_tiles)
+        tiles_area = sum((t[3].stop - t[3].start) * (t[4].stop - t[4].start) for t in new_tiles)
+        if (y1 - y0) * (x1 - x0) > COPY_REGION_MAX_WASTE * tiles_area:
+            # tiles are scattered (e.g. opposite edges after a pan), copying the region would mostly page in unused data
+            for tiy, tix, tex_tile_idx, y_slice, x_slice in new_tiles:
+                tiles_info.append((stride, tiy, tix, tex_tile_idx, _paged_copy(data[y_slice, x_slice])))
+            return tiles_info
+
+        region = _paged_copy(data[y0:y1, x0:x1])
+        for tiy, tix, tex_tile_idx, y_slice, x_slice in new_tiles:
+            tile_data = np.ascontiguousarray(region[y_slice.start - y0:y_slice.stop - y0,
+                                                    x_slice.start - x0:x_slice.stop - x0])
+            tiles_info.append((stride, tiy, tix, tex_tile_idx, tile_data))
 
         return tiles_info
 
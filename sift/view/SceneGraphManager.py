@@ -46,6 +46,7 @@ from PyQt4.QtCore import QObject, pyqtSignal, Qt
 from PyQt4.QtGui import QCursor, QPixmap
 import numpy as np
 from uuid import UUID
+from collections import namedtuple
 
 import os
 import sys
@@ -57,6 +58,9 @@ DEFAULT_SHAPE_FILE = os.path.join(DATA_DIR, 'ne_50m_admin_0_countries', 'ne_50m_
 DEFAULT_STATES_SHAPE_FILE = os.path.join(DATA_DIR, 'ne_50m_admin_1_states_provinces_lakes', 'ne_50m_admin_1_states_provinces_lakes.shp')
 DEFAULT_TEXTURE_SHAPE = (4, 16)
 
+# retiling calculations handed from the background thread to the layer in a single signal argument
+RetileResult = namedtuple('RetileResult', ('uuid', 'preferred_stride', 'tile_box', 'tiles_info', 'vertices', 'tex_coords'))
+
 
 class Markers2(Markers):
     def _set_clipper(self, node, clipper):
@@ -111,12 +115,27 @@ class MainMap(scene.Node):
 class PendingPolygon(object):
     """Temporary information holder for Probe Polygons.
     """
+    __slots__ = ('parent', 'marker', 'canvas_points', 'points', 'radius', '_pos', '_n_points')
+
+    marker_style = dict(symbol="disc",
+                        face_color=np.array([0., 0.5, 0.5, 1.]),
+                        edge_color=np.array([.5, 1.0, 1.0, 1.]),
+                        size=18.,
+                        edge_width=3.,
+                        )
+
     def __init__(self, point_parent):
         self.parent = point_parent
-        self.markers = []
+        # one Markers visual holding every pending point, created up front and hidden between polygons
+        self.marker = Markers(parent=self.parent, name='pending_polygon',
+                              pos=np.zeros((1, 3), dtype=np.float32), **self.marker_style)
+        self.marker.visible = False
         self.canvas_points = []
         self.points = []
         self.radius = 10.0
+        # marker positions, grown by doubling as points are added
+        self._pos = np.empty((16, 3), dtype=np.float32)
+        self._n_points = 0
 
     def is_complete(self, canvas_pos):
         # XXX: Can't get "visuals_at" method of the SceneCanvas to work to find if the point is ready
@@ -135,22 +154,22 @@ class PendingPolygon(object):
         self.points.append(xy_pos)
         if len(xy_pos) == 2:
             xy_pos = [xy_pos[0], xy_pos[1], z]
-        # point_visual = FakeMarker(parent=self.parent, symbol="disc", pos=np.array([xy_pos]), color=np.array([0., 0.5, 0.5, 1.]))
-        point_visual = Markers(parent=self.parent,
-                               name='polygon_%02d' % (len(self.markers),),
-                               symbol="disc", pos=np.array([xy_pos]),
-                               face_color=np.array([0., 0.5, 0.5, 1.]),
-                               edge_color=np.array([.5, 1.0, 1.0, 1.]),
-                               size=18.,
-                               edge_width=3.,
-                               )
-        self.markers.append(point_visual)
+        n = self._n_points
+        if n == len(self._pos):
+            pos = np.empty((2 * n, 3), dtype=np.float32)
+            pos[:n] = self._pos
+            self._pos = pos
+        self._pos[n] = xy_pos
+        self._n_points = n = n + 1
+        self.marker.set_data(pos=self._pos[:n], **self.marker_style)
+        self.marker.visible = True
         return False
 
     def reset(self):
-        self.markers = []
+        self.marker.visible = False
         self.canvas_points = []
         self.points = []
+        self._n_points = 0
 
 
 class LayerSet(object):
@@ -161,6 +180,12 @@ class LayerSet(object):
      - Animation loop and frame order
      - Layer Order
     """
+    # the animation timer holds a weak reference to next_frame, so keep __weakref__
+    __slots__ = ('parent', '_layers', '_layer_order', '_layer_refs', '_layer_z', '_top_visible_uuid',
+                 '_frame_order', '_frame_layers', '_n_frames', '_animating', '_frame_number',
+                 '_last_visible_idx', '_frame_change_cb', '_animation_speed', '_animation_timer',
+                 '__weakref__')
+
     def __init__(self, parent, layers=None, layer_order=None, frame_order=None, frame_change_cb=None):
         if layers is None and (layer_order is not None or frame_order is not None):
             raise ValueError("'layers' required when 'layer_order' or 'frame_order' is specified")
@@ -168,9 +193,15 @@ class LayerSet(object):
         self.parent = parent
         self._layers = {}
         self._layer_order = []  # display (z) order, top to bottom
+        self._layer_refs = []  # layers in display order, parallel to _layer_order
+        self._layer_z = {}  # uuid -> index in _layer_order
+        self._top_visible_uuid = None  # topmost visible layer, see top_layer_uuid
         self._frame_order = []  # animation order, first to last
+        self._frame_layers = []  # layers in animation order, parallel to _frame_order
+        self._n_frames = 0
         self._animating = False
         self._frame_number = 0
+        self._last_visible_idx = None  # frame index shown by _set_visible_child, None forces a full update
         self._frame_change_cb = frame_change_cb
         self._animation_speed = DEFAULT_ANIMATION_DELAY  # milliseconds
         self._animation_timer = app.Timer(self._animation_speed/1000.0, connect=self.next_frame)
@@ -192,7 +223,7 @@ class LayerSet(object):
 
     @property
     def max_frame(self):
-        return len(self._frame_order)
+        return self._n_frames
 
     @property
     def animation_speed(self):
@@ -225,6 +256,13 @@ class LayerSet(object):
         self._layers[uuid] = layer
         self._layer_order.insert(0, uuid)
         self.update_layers_z()
+        if uuid in self._frame_order:
+            self._update_frame_layers()
+        if layer.visible:
+            # new layers go on top
+            self._top_visible_uuid = uuid
+        elif uuid == self._top_visible_uuid:
+            self._top_visible_uuid = self._find_top_visible()
         # self._frame_order.append(uuid)
 
     def set_layer_order(self, layer_order):
@@ -235,6 +273,7 @@ class LayerSet(object):
                 return
         self._layer_order = list(layer_order)
         self.update_layers_z()
+        self._top_visible_uuid = self._find_top_visible()
 
     @property
     def frame_order(self):
@@ -247,32 +286,57 @@ class LayerSet(object):
                 LOG.error('set_frame_order cannot deal with unknown layer {}'.format(o))
                 return
         self._frame_order = frame_order
+        self._update_frame_layers()
         # FIXME: ticket #92: this is not a good idea
         self._frame_number = 0
+        self._last_visible_idx = None
         # LOG.debug('accepted new frame order of length {}'.format(len(frame_order)))
         # if self._frame_change_cb is not None and self._frame_order:
         #     uuid = self._frame_order[self._frame_number]
         #     self._frame_change_cb((self._frame_number, len(self._frame_order), self._animating, uuid))
 
+    def _update_frame_layers(self):
+        self._frame_layers = [self._layers[u] for u in self._frame_order]
+        self._n_frames = len(self._frame_order)
+
     def update_layers_z(self):
-        for z_level, uuid in enumerate(self._layer_order):
-            transform = self._layers[uuid].transform
+        self._layer_z = {}
+        self._layer_refs = [self._layers[uuid] for uuid in self._layer_order]
+        for z_level, (uuid, layer) in enumerate(zip(self._layer_order, self._layer_refs)):
+            self._layer_z[uuid] = z_level
+            transform = layer.transform
             if isinstance(transform, ChainTransform):
                 # assume ChainTransform where the last transform is STTransform for Z level
                 transform = transform.transforms[-1]
             transform.translate = (0, 0, 0-int(z_level))
-            self._layers[uuid].order = len(self._layer_order) - int(z_level)
+            layer.order = len(self._layer_order) - int(z_level)
         # Need to tell the scene to recalculate the drawing order (HACK, but it works)
         # FIXME: This should probably be accomplished by overriding the right method from the Node or Visual class
         self.parent.main_canvas._update_scenegraph(None)
 
-    def top_layer_uuid(self):
-        for layer_uuid in self._layer_order:
-            if self._layers[layer_uuid].visible:
+    def _find_top_visible(self):
+        for layer_uuid, layer in zip(self._layer_order, self._layer_refs):
+            if layer.visible:
                 return layer_uuid
         # None of the image layers are visible
         return None
 
+    def _update_top_visible(self, uuid, visible):
+        top = self._top_visible_uuid
+        if visible:
+            z = self._layer_z.get(uuid)
+            top_z = None if top is None else self._layer_z.get(top)
+            if z is None or (top is not None and top_z is None):
+                # layers outside the current order have no z, fall back to a full scan of the ordered layers
+                self._top_visible_uuid = self._find_top_visible()
+            elif top is None or z < top_z:
+                self._top_visible_uuid = uuid
+        elif uuid == top:
+            self._top_visible_uuid = self._find_top_visible()
+
+    def top_layer_uuid(self):
+        return self._top_visible_uuid
+
     @property
     def animating(self):
         return self._animating
@@ -289,6 +353,8 @@ class LayerSet(object):
         elif not self._animating and animate and self._frame_order:
             # We are not currently, but want to be
             self._animating = True
+            # visibility may have been changed outside of the animation loop
+            self._last_visible_idx = None
             self._animation_timer.start()
             # TODO: Add a proper AnimationEvent to self.events
         if self._frame_change_cb is not None and self._frame_order:
@@ -302,22 +368,39 @@ class LayerSet(object):
     def _set_visible_node(self, node):
         """Set all nodes to invisible except for the `event.added` node.
         """
-        for child in self._layers.values():
+        for child in self._layer_refs:
             with child.events.blocker():
-                if child is node.added:
-                    child.visible = True
-                else:
-                    child.visible = False
+                child.visible = child is node.added
+        self._top_visible_uuid = self._find_top_visible()
+
+    def layer_visibility_changed(self, uuid):
+        """Notify the layer set that a layer's visibility was changed outside of the animation loop.
+        """
+        self._last_visible_idx = None
+        layer = self._layers.get(uuid)
+        if layer is not None:
+            self._update_top_visible(uuid, layer.visible)
 
     def _set_visible_child(self, frame_number):
-        for idx, uuid in enumerate(self._frame_order):
-            child = self._layers[uuid]
-            # not sure if this is actually doing anything
+        prev = self._last_visible_idx
+        if prev is None:
+            # first frame since the frame order changed, make sure everything else is hidden
+            for idx, child in enumerate(self._frame_layers):
+                # not sure if this is actually doing anything
+                with child.events.blocker():
+                    child.visible = idx == frame_number
+            self._top_visible_uuid = self._find_top_visible()
+        elif prev != frame_number:
+            # exactly one frame is visible at a time, only the old and new frames change
+            child = self._frame_layers[frame_number]
             with child.events.blocker():
-                if idx == frame_number:
-                    child.visible = True
-                else:
-                    child.visible = False
+                child.visible = True
+            self._update_top_visible(self._frame_order[frame_number], True)
+            child = self._frame_layers[prev]
+            with child.events.blocker():
+                child.visible = False
+            self._update_top_visible(self._frame_order[prev], False)
+        self._last_visible_idx = frame_number
 
     def next_frame(self, event=None, frame_number=None):
         """
@@ -326,7 +409,7 @@ class LayerSet(object):
         :param frame_number: optional frame to go to, from 0
         :return:
         """
-        lfo = len(self._frame_order)
+        lfo = self._n_frames
         frame = self._frame_number
         if frame_number is None:
             frame = self._frame_number + 1
@@ -452,10 +535,13 @@ class SceneGraphManager(QObject):
 
     _current_tool = None
     _color_choices = None
+    # tools in cycling order for next_tool, and their positions
+    _tool_names = tuple(TOOL)
+    _tool_index = {tool: idx for idx, tool in enumerate(_tool_names)}
 
     # FIXME: many more undocumented member variables
 
-    didRetilingCalcs = pyqtSignal(object, object, object, object, object, object)
+    didRetilingCalcs = pyqtSignal(object)  # RetileResult
     didChangeFrame = pyqtSignal(tuple)
     didChangeLayerVisibility = pyqtSignal(dict)  # similar to document didChangeLayerVisibility
     newPointProbe = pyqtSignal(str, tuple)
@@ -493,6 +579,9 @@ class SceneGraphManager(QObject):
             np.array([0., 0., 0., 0.], dtype=np.float32), # transparent
         ]
 
+        self._probe_imap = None  # cached canvas -> map inverse transform for probes, see _probe_map_pos
+        self._last_view_key = {}  # uuid -> (element, view key) at its last assessment, see on_view_change
+        self._applied_prez = {}  # uuid -> (element, colormap, climits) last applied, see rebuild_presentation
         self.setup_initial_canvas(center)
         self.pending_polygon = PendingPolygon(self.main_map)
 
@@ -576,6 +665,11 @@ class SceneGraphManager(QObject):
         self.latlon_grid = self._init_latlon_grid_layer(color=self._color_choices[self._latlon_grid_color_idx])
         self.latlon_grid.transform = STTransform(translate=(0, 0, 45))
 
+        # the cached probe transform depends on the map projection, the camera and the canvas size
+        self.main_map.events.transform_change.connect(self._invalidate_probe_imap)
+        self.pz_camera.transform.changed.connect(self._invalidate_probe_imap)
+        self.main_canvas.events.resize.connect(self._invalidate_probe_imap)
+
         self.create_test_image()
 
         # Make the camera center on Guam
@@ -625,6 +719,7 @@ class SceneGraphManager(QObject):
 
     def set_projection(self, projection_name, proj_info, center=None):
         self.main_map.transform = PROJ4Transform(proj_info['proj4_str'])
+        self._invalidate_probe_imap()
         center = center or proj_info["default_center"]
         width = proj_info["default_width"] / 2.
         height = proj_info["default_height"] / 2.
@@ -634,6 +729,8 @@ class SceneGraphManager(QObject):
         for img in self.image_elements.values():
             if hasattr(img, 'determine_reference_points'):
                 img.determine_reference_points()
+        # the camera may not have moved but every layer's view of the data did
+        self._last_view_key.clear()
         self.on_view_change(None)
 
     def _init_latlon_grid_layer(self, color=None, resolution=5.):
@@ -673,6 +770,18 @@ class SceneGraphManager(QObject):
         return Line(pos=points2, connect="strip", color=color, parent=self.main_map)
         # return Line(pos=points, connect="strip", color=color, parent=self.main_map)
 
+    def _invalidate_probe_imap(self, event=None):
+        self._probe_imap = None
+
+    def _probe_map_pos(self, buffer_pos):
+        """Map a framebuffer position to map coordinates, reusing the transform until the view changes.
+        """
+        if self._probe_imap is None:
+            # FIXME: We should be able to use the main_map object to do the transform...but it doesn't work (waiting on vispy developers)
+            # self._probe_imap = self.main_map.transforms.get_transform().imap
+            self._probe_imap = self.borders.transforms.get_transform().imap
+        return self._probe_imap(buffer_pos)
+
     def on_mouse_press_point(self, event):
         """Handle mouse events that mean we are using the point probe.
         """
@@ -681,9 +790,7 @@ class SceneGraphManager(QObject):
         modifiers = event.mouse_event.modifiers
         if (event.button == 2 and not modifiers) or (self._current_tool == TOOL.POINT_PROBE and event.button == 1):
             buffer_pos = event.sources[0].transforms.get_transform().map(event.pos)
-            # FIXME: We should be able to use the main_map object to do the transform...but it doesn't work (waiting on vispy developers)
-            # map_pos = self.main_map.transforms.get_transform().imap(buffer_pos)
-            map_pos = self.borders.transforms.get_transform().imap(buffer_pos)
+            map_pos = self._probe_map_pos(buffer_pos)
             if np.any(np.abs(map_pos[:2]) > 1e25):
                 LOG.error("Invalid point probe location")
                 return
@@ -697,7 +804,7 @@ class SceneGraphManager(QObject):
         modifiers = event.mouse_event.modifiers
         if (event.button == 2 and modifiers == (SHIFT,)) or (self._current_tool == TOOL.REGION_PROBE and event.button == 1):
             buffer_pos = event.sources[0].transforms.get_transform().map(event.pos)
-            map_pos = self.borders.transforms.get_transform().imap(buffer_pos)
+            map_pos = self._probe_map_pos(buffer_pos)
             if np.any(np.abs(map_pos[:2]) > 1e25):
                 LOG.error("Invalid region probe location")
                 return
@@ -707,10 +814,7 @@ class SceneGraphManager(QObject):
                 self.newProbePolygon.emit(self.layer_set.top_layer_uuid(), points)
 
     def clear_pending_polygon(self):
-        for marker in self.pending_polygon.markers:
-            # Remove the marker from the scene graph
-            marker.parent = None
-        # Reset the pending polygon object
+        # Reset the pending polygon object, its marker is hidden and reused for the next polygon
         self.pending_polygon.reset()
 
     def remove_polygon(self, name=None):
@@ -833,11 +937,12 @@ class SceneGraphManager(QObject):
 
         LOG.info("Changing tool to '%s'", name)
 
+    def change_tool_by_index(self, idx):
+        self.change_tool(self._tool_names[idx])
+
     def next_tool(self):
-        tool_names = list(TOOL)
-        idx = tool_names.index(self._current_tool)
-        idx = (idx + 1) % len(tool_names)
-        self.change_tool(tool_names[idx])
+        idx = self._tool_index[self._current_tool]
+        self.change_tool_by_index((idx + 1) % len(self._tool_names))
 
     def set_colormap(self, colormap, uuid=None):
         colormap = self.document.find_colormap(colormap)
@@ -849,6 +954,7 @@ class SceneGraphManager(QObject):
             uuids = [uuid]
 
         for uuid in uuids:
+            self._applied_prez.pop(uuid, None)
             layer = self.image_elements[uuid]
             if isinstance(layer, TiledGeolocatedImage):
                 self.image_elements[uuid].cmap = colormap
@@ -865,6 +971,7 @@ class SceneGraphManager(QObject):
             uuids = [uuid]
 
         for uuid in uuids:
+            self._applied_prez.pop(uuid, None)
             element = self.image_elements.get(uuid, None)
             if element is not None:
                 self.image_elements[uuid].clim = clims
@@ -944,6 +1051,7 @@ class SceneGraphManager(QObject):
             # remove the existing image object and create the proper type now
             image.parent = None
             del self.image_elements[layer[INFO.UUID]]
+            self._last_view_key.pop(layer[INFO.UUID], None)
 
         overview_content = self.workspace.get_content(layer.uuid, kind=p.kind)
         if p.kind == KIND.CONTOUR:
@@ -1043,6 +1151,9 @@ class SceneGraphManager(QObject):
                     elem.init_overview(overview_content)
                     elem.clim = presentation.climits
                     elem.gamma = presentation.gamma
+                    self._applied_prez.pop(layer.uuid, None)
+                    # new channel data needs retiling even if the view is the same
+                    self._last_view_key.pop(layer.uuid, None)
                     self.on_view_change(None)
                     elem.determine_reference_points()
                 else:
@@ -1089,6 +1200,8 @@ class SceneGraphManager(QObject):
             image_layer = self.image_elements[uuid_removed]
             image_layer.parent = None
             del self.image_elements[uuid_removed]
+            self._last_view_key.pop(uuid_removed, None)
+            self._applied_prez.pop(uuid_removed, None)
             LOG.info("layer {} purge from scenegraphmanager".format(uuid_removed))
         else:
             LOG.debug("Layer {} already purged from Scene Graph".format(uuid_removed))
@@ -1131,6 +1244,7 @@ class SceneGraphManager(QObject):
         if image is None:
             return
         image.visible = not image.visible if visible is None else visible
+        self.layer_set.layer_visibility_changed(uuid)
 
     def rebuild_layer_order(self, new_layer_index_order, *args, **kwargs):
         """
@@ -1161,8 +1275,16 @@ class SceneGraphManager(QObject):
         # refresh our presentation info
         # presentation_info = self.document.current_layer_set
         for uuid, layer_prez in presentation_info.items():
-            self.set_colormap(layer_prez.colormap, uuid=uuid)
-            self.set_color_limits(layer_prez.climits, uuid=uuid)
+            # colormap and limits changes are costly on the element, skip them when this element already has them
+            element = self.image_elements.get(uuid)
+            climits = layer_prez.climits
+            applied = (element, layer_prez.colormap, tuple(climits) if climits is not None else None)
+            if element is None or self._applied_prez.get(uuid) != applied:
+                self.set_colormap(layer_prez.colormap, uuid=uuid)
+                self.set_color_limits(climits, uuid=uuid)
+                if element is not None:
+                    self._applied_prez[uuid] = applied
+            # animation changes element visibility behind our back, so always apply it
             self.set_layer_visible(uuid, visible=layer_prez.visible)
             # FUTURE, if additional information is added to the presentation tuple, you must also update it here
 
@@ -1214,13 +1336,24 @@ class SceneGraphManager(QObject):
 
         self.update()
 
+    def _view_key(self):
+        rect = self.main_view.camera.rect
+        return tuple(rect.pos), tuple(rect.size), tuple(self.main_canvas.size)
+
     def on_view_change(self, scheduler):
         """Simple event handler for when we need to reassess image layers.
         """
         # Stop the timer so it doesn't continuously call this slot
         if scheduler:
             scheduler.stop()
+        view_key = self._view_key()
+
         def _assess(uuid, child):
+            # an unchanged view gives the same assessment, and any retile it asked for is already queued
+            last = self._last_view_key.get(uuid)
+            if last is not None and last[0] is child and last[1] == view_key:
+                return
+            self._last_view_key[uuid] = (child, view_key)
             need_retile, preferred_stride, tile_box = child.assess()
             if need_retile:
                 self.start_retiling_task(uuid, preferred_stride, tile_box)
@@ -1257,7 +1390,7 @@ class SceneGraphManager(QObject):
             data = data[::preferred_stride[0], ::preferred_stride[1]]
             tiles_info, vertices, tex_coords = child.retile(data, preferred_stride, tile_box)
             yield {TASK_DOING: 'Re-tiling', TASK_PROGRESS: 1.0}
-            self.didRetilingCalcs.emit(uuid, preferred_stride, tile_box, tiles_info, vertices, tex_coords)
+            self.didRetilingCalcs.emit(RetileResult(uuid, preferred_stride, tile_box, tiles_info, vertices, tex_coords))
         else:
             child = self.image_elements[uuid]
             data = [self.workspace.get_content(d_uuid, lod=preferred_stride) for d_uuid in self.composite_element_dependencies[uuid]]
@@ -1266,17 +1399,17 @@ class SceneGraphManager(QObject):
             data = [d[::int(preferred_stride[0] / factor), ::int(preferred_stride[1] / factor)] if d is not None else None for factor, d in zip(child._channel_factors, data)]
             tiles_info, vertices, tex_coords = child.retile(data, preferred_stride, tile_box)
             yield {TASK_DOING: 'Re-tiling', TASK_PROGRESS: 1.0}
-            self.didRetilingCalcs.emit(uuid, preferred_stride, tile_box, tiles_info, vertices, tex_coords)
+            self.didRetilingCalcs.emit(RetileResult(uuid, preferred_stride, tile_box, tiles_info, vertices, tex_coords))
         self.workspace.bgnd_task_complete()  # FUTURE: consider a threading context manager for this??
 
-    def _set_retiled(self, uuid, preferred_stride, tile_box, tiles_info, vertices, tex_coords):
+    def _set_retiled(self, result):
         """Slot to take data from background thread and apply it to the layer living in the image layer.
         """
-        child = self.image_elements.get(uuid, None)
+        child = self.image_elements.get(result.uuid, None)
         if child is None:
-            LOG.warning('unable to find uuid %s in image_elements' % uuid)
+            LOG.warning('unable to find uuid %s in image_elements' % result.uuid)
             return
-        child.set_retiled(preferred_stride, tile_box, tiles_info, vertices, tex_coords)
+        child.set_retiled(result.preferred_stride, result.tile_box, result.tiles_info, result.vertices, result.tex_coords)
         child.update()
 
     def on_layer_visible_toggle(self, visible):
@@ -17,6 +17,7 @@ import re
 from abc import ABC, abstractmethod, abstractclassmethod
 from collections import namedtuple
 from datetime import datetime, timedelta
+from uuid import uuid1
 from typing import Sequence, Iterable, Generator, Mapping, Tuple
 import gdal
 import osr
@@ -296,7 +297,6 @@ class aSingleFileWithSingleProductImporter(aImporter):
             return zult
 
         # else probe the file and add product metadata, without importing content
-        from uuid import uuid1
         uuid = uuid1()
         meta = self.product_metadata()
         meta[INFO.UUID] = uuid
@@ -899,7 +899,6 @@ class SatPyImporter(aImporter):
             yield from products
             return
 
-        from uuid import uuid1
         scn = self.load_all_datasets()
         for ds_id, ds in scn.datasets.items():
             # don't recreate a Product for one we already have
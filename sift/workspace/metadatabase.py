@@ -32,18 +32,21 @@ __docformat__ = 'reStructuredText'
 
 import os, sys
 import logging, unittest, argparse
+import pickle
+from importlib import import_module
 from datetime import datetime, timedelta
 from sift.common import INFO, FCS_SEP
-from functools import reduce
+from functools import reduce, lru_cache
 from uuid import UUID
 from collections import ChainMap, MutableMapping, Iterable, defaultdict
 from typing import Mapping
 
-from sqlalchemy import Table, Column, Integer, String, UnicodeText, Unicode, ForeignKey, DateTime, Interval, PickleType, Float, create_engine
+from sqlalchemy import Table, Column, Integer, String, UnicodeText, Unicode, ForeignKey, DateTime, Interval, PickleType, Float, Index, create_engine, event
 from sqlalchemy.orm import Session, relationship, sessionmaker, backref, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm.collections import attribute_mapped_collection
 from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.ext.hybrid import hybrid_property
 
 LOG = logging.getLogger(__name__)
 
@@ -94,11 +97,18 @@ Base = declarative_base()
 # products may require multiple resourcse (e.g. separate GEO; tiled imagery)
 PRODUCTS_FROM_RESOURCES_TABLE_NAME = 'product_resource_assoc_v1'
 ProductsFromResources = Table(PRODUCTS_FROM_RESOURCES_TABLE_NAME, Base.metadata,
-                              Column('product_id', Integer, ForeignKey('products_v1.id')),
-                              Column('resource_id', Integer, ForeignKey('resources_v1.id')))
+                              Column('product_id', Integer, ForeignKey('products_v1.id'), index=True),
+                              Column('resource_id', Integer, ForeignKey('resources_v1.id'), index=True))
 
 
 
+@lru_cache(maxsize=None)
+def _resolve_dotted(dotted: str):
+    """Return the class or callable named by a 'module.qualname' string"""
+    module, _, qualname = dotted.rpartition('.')
+    return reduce(getattr, qualname.split('.'), import_module(module)) if module else None
+
+
 class Resource(Base):
     """
     held metadata regarding a file that we can access and import data into the workspace from
@@ -109,11 +119,31 @@ class Resource(Base):
     id = Column(Integer, primary_key=True)
 
     # primary handler
-    format = Column(PickleType)  # classname, class or callable which can pull this data into workspace from storage
+    # 'module.qualname' of the class or callable which can pull this data into workspace from storage
+    # stored as a string rather than a pickle so reads do not unpickle and queries can filter on it
+    _format = Column('format', String, nullable=True, index=True)
+
+    @hybrid_property
+    def format(self):
+        fmt = self._format
+        if fmt is None:
+            return None
+        if isinstance(fmt, bytes):  # pickled by older workspaces
+            return pickle.loads(fmt)
+        return _resolve_dotted(fmt)
+
+    @format.setter
+    def format(self, cls):
+        self._format = None if cls is None else '{}.{}'.format(cls.__module__, cls.__qualname__)
+
+    @format.expression
+    def format(cls):
+        # queries filter on the stored 'module.qualname' string
+        return cls._format
 
     # {scheme}://{path}/{name}?{query}, default is just an absolute path in filesystem
     scheme = Column(Unicode, nullable=True)  # uri scheme for the content (the part left of ://), assume file:// by default
-    path = Column(Unicode)  # '/' separated real path
+    path = Column(Unicode, index=True)  # '/' separated real path
     query = Column(Unicode, nullable=True)  # query portion of a URI or URL, e.g. 'interval=1m&stride=2'
 
     mtime = Column(DateTime)  # last observed mtime of the file, for change checking
@@ -208,10 +238,13 @@ class Product(Base):
     additional information is stored in a key-value table addressable as product[key:str]
     """
     __tablename__ = 'products_v1'
+    __table_args__ = (
+        Index('ix_products_v1_family_category', 'family', 'category'),  # track lookups
+    )
 
     # identity information
     id = Column(Integer, primary_key=True)
-    resource_id = Column(Integer, ForeignKey(Resource.id))
+    resource_id = Column(Integer, ForeignKey(Resource.id), index=True)
     # relationship: .resource
     uuid_str = Column(String, nullable=False, unique=True)  # UUID representing this data in SIFT, or None if not in cache
 
@@ -477,7 +510,7 @@ class Content(Base):
 
     __tablename__ = 'contents_v1'
     id = Column(Integer, primary_key=True)
-    product_id = Column(Integer, ForeignKey(Product.id))
+    product_id = Column(Integer, ForeignKey(Product.id), index=True)
 
     # handle overview versus detailed data
     lod = Column(Integer)  # power of 2 level of detail; 0 for coarse-resolution overview
@@ -678,6 +711,22 @@ class ContentKeyValue(Base):
 # singleton instance
 _MDB = None
 
+# applied to every new SQLite connection
+# WAL lets the collector thread write while the GUI reads; NORMAL sync is safe under WAL and avoids an fsync per commit
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
 
 class Metadatabase(object):
     """
@@ -721,6 +770,8 @@ class Metadatabase(object):
         assert(self.engine is None)
         assert(self.connection is None)
         self.engine = create_engine(uri, **kwargs)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _set_sqlite_pragmas)
         LOG.info('attaching database at {}'.format(uri))
         if create_tables or not self._all_tables_present():
             LOG.info("creating database tables")
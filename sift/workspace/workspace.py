@@ -1222,15 +1222,24 @@ class Workspace(QObject):
         )
         return affine
 
-    def _position_to_index(self, dsi_or_uuid, xy_pos):
+    def _position_to_index(self, dsi_or_uuid, xy_pos, projected=None):
+        """
+        :param projected: optional dict of proj4 string to projected xy_pos, shared across calls for the same position
+        """
         info = self.get_info(dsi_or_uuid)
         if info is None:
             return None, None
-        # Assume `xy_pos` is lon/lat value
-        if '+proj=latlong' in info[INFO.PROJ]:
-            x, y = xy_pos[:2]
-        else:
-            x, y = Proj(info[INFO.PROJ])(*xy_pos)
+        proj = info[INFO.PROJ]
+        xy = projected.get(proj) if projected is not None else None
+        if xy is None:
+            # Assume `xy_pos` is lon/lat value
+            if '+proj=latlong' in proj:
+                xy = xy_pos[:2]
+            else:
+                xy = Proj(proj)(*xy_pos)
+            if projected is not None:
+                projected[proj] = xy
+        x, y = xy
         col = (x - info[INFO.ORIGIN_X]) / info[INFO.CELL_WIDTH]
         row = (y - info[INFO.ORIGIN_Y]) / info[INFO.CELL_HEIGHT]
         return np.int64(np.round(row)), np.int64(np.round(col))
@@ -1254,6 +1263,25 @@ class Workspace(QObject):
             raise ValueError("X/Y position is outside of image with UUID: %s", dsi_or_uuid)
         return data[row, col]
 
+    def get_content_points(self, uuids, xy_pos):
+        """
+        sample several products at the same position, projecting the position once per distinct projection
+        :param uuids: sequence of product UUIDs
+        :param xy_pos: lon/lat position
+        :return: float64 array of values, NaN where a product has no position information
+        """
+        values = np.full(len(uuids), np.nan, dtype=np.float64)
+        projected = {}
+        for i, uuid in enumerate(uuids):
+            row, col = self._position_to_index(uuid, xy_pos, projected=projected)
+            if row is None or col is None:
+                continue
+            data = self.get_content(uuid)
+            if not ((0 <= col < data.shape[1]) and (0 <= row < data.shape[0])):
+                raise ValueError("X/Y position is outside of image with UUID: %s", uuid)
+            values[i] = data[row, col]
+        return values
+
     def get_content_polygon(self, dsi_or_uuid, points):
         data = self.get_content(dsi_or_uuid)
         trans = self._create_layer_affine(dsi_or_uuid)